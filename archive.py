@@ -0,0 +1,189 @@
+# archive.py
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import metrics
+from utils import CACHE_DIR, open_sqlite, write_atomic
+
+log = logging.getLogger(__name__)
+
+# Archivo de todo lo que se descarga (portadas, notas, JSON del API, páginas renderizadas):
+#   objects/ab/<sha256>.gz -> cuerpo comprimido, guardado una sola vez por contenido
+#   index.sqlite3          -> una fila por descarga: URL, parámetros, hora, status y cabeceras
+# Con --replay, main.py vuelve a correr todo el pipeline leyendo de aquí, sin red.
+ARCHIVE_DIR = os.environ.get("RSS_ARCHIVE_DIR", os.path.join(CACHE_DIR, "archive"))
+DB_PATH = os.path.join(ARCHIVE_DIR, "index.sqlite3")
+OBJECTS_DIR = os.path.join(ARCHIVE_DIR, "objects")
+
+# Se puede apagar con --no-archive (o RSS_ARCHIVE=0)
+ENABLED = os.environ.get("RSS_ARCHIVE", "1") != "0"
+
+# Modo replay: no se sale a la red y cada petición se responde con la última copia
+# archivada hasta REPLAY_UNTIL (epoch; None = la más reciente)
+REPLAY = False
+REPLAY_UNTIL = None
+
+# Origen de cada copia: respuesta HTTP o HTML de Chrome (browser_pool.render)
+HTTP = "http"
+BROWSER = "browser"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fetches (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    url TEXT NOT NULL,
+    query TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    status INTEGER NOT NULL,
+    final_url TEXT,
+    encoding TEXT,
+    headers TEXT,
+    digest TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fetches_lookup ON fetches (source, url, query, fetched_at);
+"""
+
+_conn = None
+_lock = threading.Lock()
+
+
+def _connect():
+    global _conn
+    if _conn is None:
+        # Una conexión compartida entre los hilos del crawler, protegida por _lock
+        _conn = open_sqlite(DB_PATH, _SCHEMA)
+    return _conn
+
+
+def set_enabled(enabled):
+    global ENABLED
+    ENABLED = enabled
+
+
+def set_replay(until=None):
+    """Activa el modo replay; `until` (epoch) limita las copias a las descargadas hasta entonces."""
+    global REPLAY, REPLAY_UNTIL
+    REPLAY = True
+    REPLAY_UNTIL = until
+
+
+def _query(params):
+    return urlencode(sorted(params.items()), doseq=True) if params else ""
+
+
+def _object_path(digest):
+    return os.path.join(OBJECTS_DIR, digest[:2], digest + ".gz")
+
+
+def _store_object(body):
+    digest = hashlib.sha256(body).hexdigest()
+    path = _object_path(digest)
+    if not os.path.exists(path):
+        write_atomic(path, gzip.compress(body, compresslevel=6))
+    return digest
+
+
+def _load_object(digest):
+    with open(_object_path(digest), "rb") as f:
+        return gzip.decompress(f.read())
+
+
+def _insert(source, url, query, status, final_url, encoding, headers, body):
+    digest = _store_object(body)
+    with _lock:
+        conn = _connect()
+        conn.execute(
+            "INSERT INTO fetches (source, url, query, fetched_at, status, final_url, encoding, headers, digest) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (source, url, query, time.time(), status, final_url, encoding, headers, digest),
+        )
+        conn.commit()
+
+
+def record(url, params, response):
+    """Archiva una respuesta HTTP (también las que salen de http_cache)."""
+    if not ENABLED or REPLAY:
+        return
+    try:
+        _insert(HTTP, url, _query(params), response.status_code, response.url,
+                response.encoding, json.dumps(dict(response.headers)), response.content or b"")
+    except Exception as e:
+        # El archivo nunca debe tumbar una descarga que sí funcionó
+        log.warning("No se pudo archivar %s: %s", url, e)
+
+
+def record_page(url, html):
+    """Archiva el HTML de una página renderizada en Chrome."""
+    if not ENABLED or REPLAY or not html:
+        return
+    try:
+        _insert(BROWSER, url, "", 200, url, "utf-8", None, html.encode("utf-8"))
+    except Exception as e:
+        log.warning("No se pudo archivar %s: %s", url, e)
+
+
+def _rows(source, url, query=None):
+    """Copias archivadas de `url` dentro del límite de replay, de la más vieja a la más nueva."""
+    sql = ("SELECT query, status, final_url, encoding, headers, digest FROM fetches "
+           "WHERE source = ? AND url = ?")
+    args = [source, url]
+    if query is not None:
+        sql += " AND query = ?"
+        args.append(query)
+    if REPLAY_UNTIL is not None:
+        sql += " AND fetched_at <= ?"
+        args.append(REPLAY_UNTIL)
+    sql += " ORDER BY fetched_at, id"
+    with _lock:
+        return _connect().execute(sql, args).fetchall()
+
+
+def _to_response(row):
+    _, status, final_url, encoding, headers, digest = row
+    response = requests.Response()
+    response.status_code = status
+    response.reason = "OK" if status == 200 else ""
+    response.url = final_url
+    response.headers = CaseInsensitiveDict(json.loads(headers) if headers else {})
+    response.encoding = encoding
+    response._content = _load_object(digest)
+    response.from_cache = True
+    return response
+
+
+def replay(url, params=None):
+    """
+    Respuesta archivada para la petición (URL + parámetros). Si no se descargó nunca,
+    lanza ConnectionError, igual que una falla de red: los scrapers ya saben manejarla.
+    """
+    rows = _rows(HTTP, url, _query(params))
+    metrics.inc("archive_replays_total", result="hit" if rows else "miss")
+    if not rows:
+        raise requests.ConnectionError(f"{url} no está en el archivo")
+    return _to_response(rows[-1])
+
+
+def replay_page(url):
+    """HTML renderizado archivado de `url`."""
+    rows = _rows(BROWSER, url, "")
+    if not rows:
+        raise requests.ConnectionError(f"{url} no está en el archivo")
+    return _load_object(rows[-1][5]).decode("utf-8")
+
+
+def history(url):
+    """
+    Todas las respuestas archivadas de `url` con cualquier parámetro, de la más vieja
+    a la más nueva, como (params, response). Para los API cuya consulta depende de
+    estado guardado (p. ej. el cursor de wp_client) y no se puede repetir tal cual.
+    """
+    return [(dict(parse_qsl(row[0])), _to_response(row)) for row in _rows(HTTP, url)]
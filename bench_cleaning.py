@@ -0,0 +1,114 @@
+# bench_cleaning.py
+"""
+Compara el rendimiento de la limpieza de textos: la implementación anterior de
+utils.clean_article_text (regex recompiladas y any() sobre la lista de frases en
+cada línea) contra el motor compilado de cleaning.py.
+
+Usa los <texto> de los XML que ya generó main.py (<sitio>/<seccion>.xml):
+
+    python bench_cleaning.py                 # todos los XML bajo el directorio actual
+    python bench_cleaning.py forbes/*.xml    # solo algunos
+    python bench_cleaning.py --repeat 20
+"""
+import argparse
+import glob
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+
+import cleaning
+
+
+def legacy_clean_article_text(text):
+    """Copia de la versión anterior, solo como referencia para la comparación."""
+    if not text:
+        return ""
+    re_info_de = re.compile(r"con informaci[oó]n de", re.IGNORECASE)
+    re_social_handle = re.compile(r"\(@[\w]+/[xX]?\)?")
+    spam_phrases = [
+        "compartir",
+        "¿te gusta informarte por google news?",
+        "sigue nuestro showcase",
+        "facebook", "twitter", "instagram", "síguenos", "fuente:", "cortesía:",
+        "x",
+        "sigue el minuto a minuto", "en vivo por internet", "actualizar narración",
+        "canal: sin trasmisión", "te interesa", "marca.com", "se ampliará información",
+        "pronóstico marca mx", "dónde ver", "horario",
+        "con información de efe",
+        "este artículo fue publicado originalmente por forbes us",
+        "este artículo se publicó originalmente en forbes us",
+        "con información de reuters"
+        "Este artículo fue publicado originalmente en Forbes US"
+        "Este artículo cuenta con información parcial publicada en Forbes US."
+    ]
+    clean_lines = []
+    for line in text.split('\n'):
+        stripped_line = line.strip()
+        if not stripped_line:
+            continue
+        lower_line = stripped_line.lower()
+        if any(phrase in lower_line for phrase in spam_phrases):
+            continue
+        if re_info_de.search(lower_line):
+            continue
+        if re_social_handle.search(line):
+            continue
+        clean_lines.append(stripped_line)
+    return "\n".join(clean_lines)
+
+
+def load_texts(paths):
+    """Devuelve [(sitio, texto)] leyendo los <texto> de los XML indicados."""
+    texts = []
+    for path in paths:
+        site = os.path.basename(os.path.dirname(os.path.abspath(path)))
+        try:
+            for _, elem in ET.iterparse(path):
+                if elem.tag == 'texto' and elem.text:
+                    texts.append((site, elem.text))
+                elem.clear()
+        except ET.ParseError as e:
+            print(f"Saltando {path}: {e}")
+    return texts
+
+
+def _timeit(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='*', help="XML a usar (por defecto */*.xml)")
+    parser.add_argument('--repeat', type=int, default=5, help="repeticiones; se reporta la mejor")
+    args = parser.parse_args()
+
+    paths = args.paths or [p for p in glob.glob('*/*.xml') if not p.startswith('.')]
+    texts = load_texts(paths)
+    if not texts:
+        print("No se encontraron textos. Corre main.py primero o indica archivos XML.")
+        return
+
+    raw = [t for _, t in texts]
+    by_site = {}
+    for site, text in texts:
+        by_site.setdefault(site, []).append(text)
+    megabytes = sum(len(t.encode('utf-8')) for t in raw) / 1e6
+
+    legacy = _timeit(lambda: [legacy_clean_article_text(t) for t in raw], args.repeat)
+    compiled = _timeit(lambda: [cleaning.clean_article_text(t) for t in raw], args.repeat)
+    batch = _timeit(lambda: [cleaning.clean_many(ts, site) for site, ts in by_site.items()], args.repeat)
+
+    print(f"{len(raw)} textos de {len(paths)} archivos ({megabytes:.2f} MB), mejor de {args.repeat}:")
+    for name, secs in (("anterior", legacy), ("compilado", compiled), ("por lotes/sitio", batch)):
+        print(f"  {name:<16} {secs * 1000:9.1f} ms  {len(raw) / secs:10.0f} textos/s  "
+              f"{megabytes / secs:7.2f} MB/s  x{legacy / secs:.1f}")
+
+
+if __name__ == "__main__":
+    main()
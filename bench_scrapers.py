@@ -0,0 +1,267 @@
+# bench_scrapers.py
+"""
+Benchmark sin red de las etapas de extracción de cada sitio, sobre fixtures grabados.
+
+Primero se graban los fixtures (esto sí usa la red y, para La Crónica y El Universal,
+el navegador compartido):
+
+    python bench_scrapers.py record                  # todas las secciones de sites.SITES
+    python bench_scrapers.py record --sites excelsior marca --articles 3
+
+Eso deja en fixtures/<sitio>/<seccion>/ la portada (listing.html, o posts.json para los
+sitios WordPress), unas cuantas notas (article_N.html) y un manifest.json. Después:
+
+    python bench_scrapers.py run                     # todos los fixtures
+    python bench_scrapers.py run --sites excelsior --repeat 10
+
+mide por separado, y sin tocar la red, la extracción de enlaces de la portada, el parseo
+de newspaper, la elección de imagen de Excélsior, el texto de content.rendered de los
+sitios WordPress y clean_article_text, y reporta
+páginas/s y artículos/s por sitio (la mejor de --repeat vueltas).
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from urllib.parse import urlparse
+
+from cleaning import clean_article_text
+import extraction
+from sites import SITES
+from utils import ordered_unique
+import scraper_cronica
+import scraper_excelsior
+import scraper_forbes
+import scraper_infobae
+import scraper_jornada
+import scraper_marca
+import scraper_netnoticias
+import scraper_noventagrados
+import scraper_sdp
+import scraper_unanimo
+import scraper_universal
+import wp_client
+
+FIXTURES_DIR = os.environ.get("RSS_FIXTURES_DIR", "fixtures")
+
+# Notas a grabar por sección
+DEFAULT_ARTICLES = 5
+
+# Sitios que se leen del WP REST API: su "portada" es la respuesta JSON de posts
+WP_SITES = {
+    'forbes': scraper_forbes,
+    'unanimo': scraper_unanimo,
+}
+
+# Sitios que se raspan desde el HTML de la portada
+HTML_SITES = {
+    'excelsior': scraper_excelsior,
+    'cronica': scraper_cronica,
+    'noventagrados': scraper_noventagrados,
+    'netnoticias': scraper_netnoticias,
+    'marca': scraper_marca,
+    'universal': scraper_universal,
+    'jornada': scraper_jornada,
+    'sdp': scraper_sdp,
+    'infobae': scraper_infobae,
+}
+
+# Idioma con el que cada scraper crea el Article de newspaper
+ARTICLE_LANGUAGE = {site: 'es' for site in ('infobae', 'jornada', 'marca', 'sdp', 'unanimo', 'universal')}
+
+
+def _wp_links(site, posts):
+    return [wp_client.post_summary(p)[0] for p in posts]
+
+
+def extract_links(site, url, listing):
+    """Enlaces de una portada grabada, tal como los obtendría el scraper del sitio."""
+    if site in WP_SITES:
+        return [link for link in _wp_links(site, listing) if link]
+    # Los fixtures se guardan en UTF-8; se pasan como bytes, igual que response.content
+    return ordered_unique(HTML_SITES[site]._collect_links(url, listing, 'utf-8'), base_url=url)
+
+
+def parse_article(site, url, html):
+    return extraction.parse_article(url, html, ARTICLE_LANGUAGE.get(site))
+
+
+# --- Grabación -----------------------------------------------------------------
+
+def _wp_category(site, url):
+    module = WP_SITES[site]
+    if site == 'forbes':
+        slug = module._slug_from_section_url(url)
+    else:
+        parts = [p for p in urlparse(url).path.strip("/").split("/") if p]
+        slug = parts[-1].lower() if parts else None
+    return module.WP.category_id(slug) if slug else None
+
+
+def _record_listing(site, spec, url):
+    """Descarga la portada de la sección; devuelve (nombre de archivo, contenido, enlaces)."""
+    import fetch
+
+    if site in WP_SITES:
+        cat_id = _wp_category(site, url)
+        if not cat_id:
+            raise ValueError(f"no se pudo resolver la categoría de {url}")
+        posts = WP_SITES[site].WP.fetch_posts(cat_id, limit=20)
+        return 'posts.json', json.dumps(posts, ensure_ascii=False), extract_links(site, url, posts)
+
+    if spec.get('render'):
+        import browser_pool
+        html = browser_pool.render(url, spec['render'], timeout=spec.get('timeout') or browser_pool.DEFAULT_TIMEOUT)
+    else:
+        html = fetch.fetch_html(url)
+    return 'listing.html', html, extract_links(site, url, html)
+
+
+def _write(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def record(sites, n_articles):
+    import fetch
+    from crawler import apply_site_policies
+
+    apply_site_policies(sites)
+    for site, spec in sites.items():
+        for section, url in spec['sections'].items():
+            folder = os.path.join(FIXTURES_DIR, site, section)
+            os.makedirs(folder, exist_ok=True)
+            try:
+                listing_file, content, links = _record_listing(site, spec, url)
+            except Exception as e:
+                print(f"[{site}/{section}] No se pudo grabar la portada: {e}")
+                continue
+            _write(os.path.join(folder, listing_file), content)
+
+            articles = []
+            for link in links:
+                if len(articles) >= n_articles:
+                    break
+                try:
+                    html = fetch.fetch_html(link)
+                except Exception as e:
+                    print(f"[{site}/{section}] Saltando {link}: {e}")
+                    continue
+                filename = f"article_{len(articles)}.html"
+                _write(os.path.join(folder, filename), html)
+                articles.append({'url': link, 'file': filename})
+
+            manifest = {'site': site, 'section': section, 'url': url,
+                        'listing': listing_file, 'articles': articles}
+            _write(os.path.join(folder, 'manifest.json'), json.dumps(manifest, ensure_ascii=False, indent=2))
+            print(f"[{site}/{section}] {len(links)} enlaces, {len(articles)} notas grabadas.")
+
+
+# --- Medición ------------------------------------------------------------------
+
+def _read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def load_fixtures(sites=None):
+    """Devuelve {sitio: [sección grabada]} con portada y notas ya leídas a memoria."""
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, '*', '*', 'manifest.json'))):
+        manifest = json.loads(_read(path))
+        if sites and manifest['site'] not in sites:
+            continue
+        folder = os.path.dirname(path)
+        listing_path = os.path.join(folder, manifest['listing'])
+        if listing_path.endswith('.json'):
+            listing = json.loads(_read(listing_path))
+        else:
+            with open(listing_path, 'rb') as f:
+                listing = f.read()
+        manifest['listing'] = listing
+        manifest['articles'] = [
+            (a['url'], _read(os.path.join(folder, a['file']))) for a in manifest['articles']
+        ]
+        fixtures.setdefault(manifest['site'], []).append(manifest)
+    return fixtures
+
+
+def _timeit(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_site(site, sections, repeat):
+    """Mide cada etapa de un sitio; devuelve {etapa: (elementos, segundos)}."""
+    articles = [(url, html) for s in sections for url, html in s['articles']]
+    results = {}
+
+    results['enlaces'] = (len(sections), _timeit(
+        lambda: [extract_links(site, s['url'], s['listing']) for s in sections], repeat))
+
+    if site in WP_SITES:
+        # Texto sacado del content.rendered que ya trae la respuesta del API
+        contents = [wp_client.post_summary(p)[3] for s in sections for p in s['listing']]
+        results['contenido'] = (len(contents), _timeit(
+            lambda: [clean_article_text(extraction.html_to_text(c), site=site) for c in contents], repeat))
+
+    if not articles:
+        return results
+
+    results['newspaper'] = (len(articles), _timeit(
+        lambda: [parse_article(site, url, html) for url, html in articles], repeat))
+
+    parsed = [(url, parse_article(site, url, html)) for url, html in articles]
+    if site == 'excelsior':
+        # Sobre el árbol que ya dejó newspaper, como en el scraper
+        results['imagen'] = (len(parsed), _timeit(
+            lambda: [scraper_excelsior._select_image(extraction.document(a), url) for url, a in parsed],
+            repeat))
+
+    texts = [a.text for _, a in parsed]
+    results['limpieza'] = (len(texts), _timeit(
+        lambda: [clean_article_text(t, site=site) for t in texts], repeat))
+    return results
+
+
+def run(sites, repeat):
+    fixtures = load_fixtures(sites)
+    if not fixtures:
+        print(f"No hay fixtures en {FIXTURES_DIR}/. Corre primero: python bench_scrapers.py record")
+        return
+
+    print(f"Mejor de {repeat} vueltas (enlaces en páginas/s, el resto en artículos/s):")
+    print(f"  {'sitio':<14}{'etapa':<12}{'n':>5}{'ms':>10}{'por seg':>12}")
+    for site, sections in fixtures.items():
+        for stage, (n, secs) in bench_site(site, sections, repeat).items():
+            rate = n / secs if secs else float('inf')
+            print(f"  {site:<14}{stage:<12}{n:>5}{secs * 1000:>10.1f}{rate:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    rec = sub.add_parser('record', help="graba fixtures desde los sitios reales")
+    rec.add_argument('--sites', nargs='*', choices=sorted(SITES), help="sitios a grabar (por defecto todos)")
+    rec.add_argument('--articles', type=int, default=DEFAULT_ARTICLES, help="notas a grabar por sección")
+
+    bench = sub.add_parser('run', help="mide las etapas sobre los fixtures grabados, sin red")
+    bench.add_argument('--sites', nargs='*', choices=sorted(SITES), help="sitios a medir (por defecto todos)")
+    bench.add_argument('--repeat', type=int, default=5, help="repeticiones; se reporta la mejor")
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        selected = {s: SITES[s] for s in (args.sites or SITES)}
+        record(selected, args.articles)
+    else:
+        run(args.sites, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+# browser_pool.py
+import atexit
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import SessionNotCreatedException, TimeoutException, WebDriverException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from webdriver_manager.chrome import ChromeDriverManager
+
+import archive
+import metrics
+import profiling
+import rate_limit
+from utils import CACHE_DIR
+
+log = logging.getLogger(__name__)
+
+# Chrome headless que se mantienen vivos durante todo el proceso
+POOL_SIZE = int(os.environ.get("RSS_BROWSERS", 2))
+
+# Ruta del chromedriver resuelto en una corrida anterior (evita consultar versiones cada vez)
+DRIVER_PATH_FILE = os.path.join(CACHE_DIR, "chromedriver_path.txt")
+
+DEFAULT_TIMEOUT = 20
+
+_driver_path = None
+_driver_lock = threading.Lock()
+
+_idle = queue.LifoQueue()
+_all = []
+_pool_lock = threading.Lock()
+
+# Política de cada portada que se abre en Chrome, configurada desde el registro
+# (sites.SITES[...]['render'] y ['timeout']): {url: (localizador, timeout)}
+PAGES = {}
+
+# Páginas que se están cargando en pestañas por adelantado: {url: Future(html | None)}
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def driver_path(refresh=False):
+    """
+    Devuelve la ruta de chromedriver. Se resuelve una sola vez por proceso y se
+    guarda en disco; ChromeDriverManager solo se usa si no hay binario en caché.
+    """
+    global _driver_path
+    with _driver_lock:
+        if _driver_path and not refresh:
+            return _driver_path
+
+        path = os.environ.get("CHROMEDRIVER")
+        if not path and not refresh and os.path.exists(DRIVER_PATH_FILE):
+            with open(DRIVER_PATH_FILE, encoding="utf-8") as f:
+                path = f.read().strip()
+        if not path or not os.path.exists(path):
+            path = ChromeDriverManager().install()
+            os.makedirs(os.path.dirname(DRIVER_PATH_FILE), exist_ok=True)
+            with open(DRIVER_PATH_FILE, "w", encoding="utf-8") as f:
+                f.write(path)
+
+        _driver_path = path
+        return path
+
+
+def _options():
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    # driver.get() no espera a que termine de cargar la página: así varias pestañas
+    # pueden cargar a la vez dentro del mismo Chrome, y cada una espera su carga en _wait.
+    options.page_load_strategy = "none"
+    return options
+
+
+def _new_driver():
+    try:
+        return webdriver.Chrome(service=Service(driver_path()), options=_options())
+    except SessionNotCreatedException:
+        # El chromedriver en caché ya no corresponde al Chrome instalado
+        return webdriver.Chrome(service=Service(driver_path(refresh=True)), options=_options())
+
+
+def _acquire():
+    try:
+        return _idle.get_nowait()
+    except queue.Empty:
+        pass
+    with _pool_lock:
+        if len(_all) < POOL_SIZE:
+            driver = _new_driver()
+            _all.append(driver)
+            return driver
+    return _idle.get()
+
+
+def _discard(driver):
+    with _pool_lock:
+        if driver in _all:
+            _all.remove(driver)
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+@contextmanager
+def browser():
+    """
+    Presta un Chrome del pool. Si el navegador falla se descarta y se crea otro
+    la próxima vez; si no, vuelve al pool ya caliente.
+    """
+    driver = _acquire()
+    try:
+        yield driver
+    except TimeoutException:
+        _idle.put(driver)
+        raise
+    except WebDriverException:
+        _discard(driver)
+        raise
+    except BaseException:
+        _idle.put(driver)
+        raise
+    else:
+        _idle.put(driver)
+
+
+def _loaded(driver):
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+def _wait(driver, locator, timeout):
+    """
+    Espera `locator` y además a que la página termine de cargar: con page_load_strategy
+    "none" driver.get() no bloquea, y el localizador (el primer <article>, el contenedor
+    del listado) aparece antes de que el listado esté completo. Si la carga no termina
+    a tiempo (anuncios que nunca acaban) se usa lo que haya, ya con el localizador.
+    """
+    wait = WebDriverWait(driver, timeout)
+    wait.until(EC.presence_of_element_located(locator))
+    try:
+        wait.until(_loaded)
+    except TimeoutException:
+        log.warning("La página %s no terminó de cargar; se usa lo ya cargado.", driver.current_url)
+    return driver.page_source
+
+
+def configure(url, locator, timeout=None):
+    """Registra el localizador a esperar y el timeout de la página `url`."""
+    PAGES[url] = (locator, timeout or DEFAULT_TIMEOUT)
+
+
+def render(url, locator=None, timeout=None):
+    """
+    Devuelve el HTML de `url` una vez que aparece `locator` (tupla de By). Sin
+    `locator` ni `timeout` se usan los que el registro declaró para la página (configure).
+    Si la página se cargó antes con prerender(), se reutiliza ese resultado.
+    El HTML queda en el archivo (archive); en modo replay sale de ahí, sin Chrome.
+    """
+    if archive.REPLAY:
+        return archive.replay_page(url)
+
+    configured_locator, configured_timeout = PAGES.get(url, (None, DEFAULT_TIMEOUT))
+    locator = locator or configured_locator
+    timeout = timeout or configured_timeout
+    if locator is None:
+        raise ValueError(f"{url} no tiene localizador: falta 'render' en sites.SITES")
+
+    with _pending_lock:
+        future = _pending.pop(url, None)
+    with profiling.stage("navegador"):
+        html = future.result() if future is not None else None
+        if html:
+            metrics.inc("render_total", result="precargada")
+        else:
+            with metrics.timer("render_seconds"):
+                with browser() as driver:
+                    rate_limit.acquire(url)
+                    driver.get(url)
+                    html = _wait(driver, locator, timeout)
+            metrics.inc("render_total", result="cargada")
+    metrics.inc("render_bytes_total", len(html))
+    archive.record_page(url, html)
+    return html
+
+
+def render_many(jobs, timeout=DEFAULT_TIMEOUT):
+    """
+    Carga varias páginas en pestañas paralelas de un mismo Chrome.
+    `jobs` es una lista de (url, locator); devuelve el HTML de cada una en el
+    mismo orden, o None para las que no cargaron a tiempo.
+    """
+    results = []
+    with browser() as driver:
+        handles = []
+        for i, (url, _) in enumerate(jobs):
+            if i:
+                driver.switch_to.new_window("tab")
+            rate_limit.acquire(url)
+            driver.get(url)
+            handles.append(driver.current_window_handle)
+
+        for handle, (url, locator) in zip(handles, jobs):
+            driver.switch_to.window(handle)
+            try:
+                results.append(_wait(driver, locator, timeout))
+            except TimeoutException:
+                log.warning("Tiempo agotado esperando %s", url)
+                results.append(None)
+
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        if handles:
+            driver.switch_to.window(handles[0])
+    return results
+
+
+def prerender(jobs, timeout=DEFAULT_TIMEOUT):
+    """
+    Empieza a cargar en segundo plano, en pestañas paralelas, las páginas de `jobs`.
+    Las llamadas posteriores a render() con esas URLs esperan ese resultado en
+    lugar de abrir su propia carga.
+    """
+    jobs = list(jobs)
+    futures = [Future() for _ in jobs]
+    with _pending_lock:
+        for (url, _), future in zip(jobs, futures):
+            _pending[url] = future
+
+    def run():
+        try:
+            htmls = render_many(jobs, timeout)
+        except Exception as e:
+            log.warning("Error precargando páginas: %s", e)
+            htmls = [None] * len(jobs)
+        for future, html in zip(futures, htmls):
+            future.set_result(html)
+
+    threading.Thread(target=run, name="prerender", daemon=True).start()
+
+
+@atexit.register
+def shutdown():
+    """Cierra todos los Chrome del pool al terminar el proceso."""
+    with _pool_lock:
+        drivers = list(_all)
+        _all.clear()
+    for driver in drivers:
+        try:
+            driver.quit()
+        except Exception:
+            pass
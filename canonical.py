@@ -0,0 +1,39 @@
+# canonical.py
+import re
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+# Puertos que sobran en la URL
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+# Variantes AMP de una nota: /amp/ al inicio, /amp al final, nota.amp(.html)
+_AMP_PREFIX = re.compile(r"^/amp(?=/)")
+_AMP_SUFFIX = re.compile(r"/amp/?$")
+_AMP_EXTENSION = re.compile(r"\.amp(?=\.html?$|$)")
+
+
+def canonical_url(url, base_url=None):
+    """
+    Forma única de la URL de una nota, para reconocerla aunque llegue de otra sección,
+    con parámetros de rastreo (?utm_..., ?intcmp=...), con #fragmento o en su versión
+    AMP: host en minúsculas sin puerto por defecto, sin query, sin fragmento y sin AMP.
+    Las relativas se resuelven contra `base_url`.
+    """
+    if not url:
+        return url
+    url = url.strip()
+    if base_url and not url.startswith('http'):
+        url = urljoin(base_url, url)
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').rstrip('.')
+    if host.startswith('amp.'):
+        host = host[4:]
+    if parts.port and str(parts.port) != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or '/'
+    path = _AMP_PREFIX.sub('', path)
+    path = _AMP_SUFFIX.sub('/', path)
+    path = _AMP_EXTENSION.sub('', path)
+    return urlunsplit((scheme, host, path, '', ''))
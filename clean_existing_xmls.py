@@ -1,45 +1,112 @@
+# clean_existing_xmls.py
+"""
+Vuelve a limpiar con las reglas actuales de cleaning.py los XML ya guardados.
 
+Recorre la carpeta de cada sitio de sites.SECTIONS (<raíz>/<sitio>/*.xml), reparte
+los archivos entre procesos y lee cada uno en streaming con iterparse. Cada XML
+limpio queda marcado con la versión de reglas de su sitio (<noticias rules="...">),
+así que en la siguiente pasada solo se tocan los archivos que quedaron viejos:
+
+    python clean_existing_xmls.py                    # todos los sitios, en la carpeta actual
+    python clean_existing_xmls.py --sites forbes marca --workers 4
+    python clean_existing_xmls.py --root d:/RSS/RSS --force
+"""
+import argparse
+import glob
 import os
 import xml.etree.ElementTree as ET
-from utils import clean_article_text
-
-FORBES_DIR = r"d:\RSS\RSS\forbes"
-
-def clean_xml_file(filepath):
-    print(f"Processing {filepath}...")
-    try:
-        tree = ET.parse(filepath)
-        root = tree.getroot()
-        modified = False
-
-        for noticia in root.findall("noticia"):
-            texto_elem = noticia.find("texto")
-            if texto_elem is not None and texto_elem.text:
-                original_text = texto_elem.text
-                cleaned_text = clean_article_text(original_text)
-                
-                # Check if text actually changed (ignoring whitespace differences that might occur)
-                if original_text.strip() != cleaned_text.strip():
-                    texto_elem.text = cleaned_text
-                    modified = True
-
-        if modified:
-            tree.write(filepath, encoding="utf-8", xml_declaration=True)
-            print(f"  - Updated {filepath}")
-        else:
-            print(f"  - No changes needed for {filepath}")
-
-    except Exception as e:
-        print(f"Error processing {filepath}: {e}")
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cleaning import clean_article_text, rules_version
+from sites import SECTIONS
+from xml_writer import XMLSectionWriter
+
+# Atributo de <noticias> con la versión de reglas con que se limpió el archivo
+RULES_ATTR = 'rules'
+
+
+def stamped_version(filepath):
+    """Versión de reglas grabada en el XML, leyendo solo la etiqueta raíz."""
+    with open(filepath, 'rb') as f:
+        for _, root in ET.iterparse(f, events=('start',)):
+            return root.get(RULES_ATTR)
+    return None
+
+
+def clean_xml_file(filepath, site, force=False):
+    """
+    Limpia un XML y lo reemplaza de forma atómica ya marcado con la versión actual.
+    Devuelve 'al día', 'limpio' (sin cambios de texto, solo la marca) o 'actualizado'.
+    """
+    version = rules_version(site)
+    if not force and stamped_version(filepath) == version:
+        return 'al día'
+
+    folder, filename = os.path.split(filepath)
+    modified = False
+    root = None
+    with XMLSectionWriter(folder, filename, attrs={RULES_ATTR: version}) as writer:
+        try:
+            for event, elem in ET.iterparse(filepath, events=('start', 'end')):
+                if root is None:
+                    root = elem
+                if event != 'end' or elem.tag != 'noticia':
+                    continue
+                texto_elem = elem.find('texto')
+                if texto_elem is not None and texto_elem.text:
+                    cleaned_text = clean_article_text(texto_elem.text, site=site)
+                    if texto_elem.text.strip() != cleaned_text.strip():
+                        texto_elem.text = cleaned_text
+                        modified = True
+                elem.tail = None
+                writer.write_element(elem)
+                # Lo ya escrito no se queda en memoria
+                root.clear()
+        except BaseException:
+            # Un XML mal formado (o cualquier otra falla) no puede dejar el archivo
+            # truncado y marcado como al día: se conserva el original sin tocar
+            writer.abort()
+            raise
+    return 'actualizado' if modified else 'limpio'
+
+
+def find_xml_files(root_dir, sites):
+    """(ruta, sitio) de cada XML dentro de la carpeta de los sitios pedidos."""
+    for site in sites:
+        for filepath in sorted(glob.glob(os.path.join(root_dir, site, '*.xml'))):
+            yield filepath, site
+
 
 def main():
-    if not os.path.exists(FORBES_DIR):
-        print(f"Directory not found: {FORBES_DIR}")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--root', default='.', help="carpeta que contiene las de cada sitio (por defecto, la actual)")
+    parser.add_argument('--sites', nargs='*', choices=sorted(SECTIONS), help="sitios a limpiar (por defecto todos)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="procesos en paralelo")
+    parser.add_argument('--force', action='store_true', help="limpia también los archivos que ya están al día")
+    args = parser.parse_args()
+
+    files = list(find_xml_files(args.root, args.sites or SECTIONS))
+    if not files:
+        print(f"No se encontraron XML de {', '.join(args.sites or SECTIONS)} en {os.path.abspath(args.root)}")
         return
 
-    for filename in os.listdir(FORBES_DIR):
-        if filename.endswith(".xml"):
-            clean_xml_file(os.path.join(FORBES_DIR, filename))
+    totals = {}
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = {executor.submit(clean_xml_file, path, site, args.force): path for path, site in files}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                status = future.result()
+            except Exception as e:
+                status = 'error'
+                print(f"Error procesando {path}: {e}")
+            else:
+                if status != 'al día':
+                    print(f"  - {path}: {status}")
+            totals[status] = totals.get(status, 0) + 1
+
+    print(f"{len(files)} archivos: " + ", ".join(f"{n} {status}" for status, n in sorted(totals.items())))
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,164 @@
+# crawler.py
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import archive
+import browser_pool
+import discovery
+import fetch
+import rate_limit
+
+log = logging.getLogger(__name__)
+
+# Secciones simultáneas por sitio si el registro no declara 'concurrency'
+DEFAULT_CONCURRENCY = 2
+
+
+def apply_site_policies(sites):
+    """
+    Traslada al resto de módulos lo que cada sitio declara en el registro:
+    ritmo por host (rate_limit), timeout de las peticiones (fetch), qué esperar
+    en el navegador (browser_pool) y feed o sitemap de noticias de cada sección
+    (discovery).
+    """
+    for spec in sites.values():
+        feeds = spec.get('feeds') or {}
+        for section, url in spec['sections'].items():
+            if spec.get('rate'):
+                rate_limit.configure(url, **spec['rate'])
+            if spec.get('timeout'):
+                fetch.set_timeout(url, spec['timeout'])
+            if spec.get('render'):
+                browser_pool.configure(url, spec['render'], spec.get('timeout'))
+            if feeds.get(section):
+                discovery.configure(url, feeds[section])
+
+
+def start_rendering(sites):
+    """
+    Para los sitios que necesitan navegador, carga todas sus secciones a la vez
+    en pestañas del mismo Chrome; cada sección recoge su HTML cuando le toca.
+    Las secciones con feed no abren pestaña: si el feed fallara o no trajera
+    suficientes notas, el scraper renderiza la portada en ese momento. En modo replay no hace falta Chrome.
+    """
+    if archive.REPLAY:
+        return
+    for spec in sites.values():
+        if not spec.get('render'):
+            continue
+        feeds = spec.get('feeds') or {}
+        pages = [(url, spec['render']) for section, url in spec['sections'].items() if not feeds.get(section)]
+        if pages:
+            browser_pool.prerender(pages, timeout=spec.get('timeout') or browser_pool.DEFAULT_TIMEOUT)
+
+
+async def _run_section(loop, executor, semaphore, process_section, site, section, url):
+    """
+    Ejecuta una sección en un hilo del pool, respetando el límite de su sitio.
+    Los scrapers siguen siendo síncronos (requests/newspaper/Selenium), así que
+    el paralelismo viene de correr varios a la vez en hilos separados.
+    Devuelve lo que devuelva `process_section`, o None si falló.
+    """
+    async with semaphore:
+        try:
+            return await loop.run_in_executor(executor, process_section, site, section, url)
+        except Exception as e:
+            log.exception("Error inesperado en %s/%s: %s", site, section, e)
+            return None
+
+
+async def crawl(sites, process_section):
+    """
+    Lanza todas las secciones de todos los sitios de forma concurrente.
+
+    `sites` tiene la forma de sites.SITES y `process_section(site, section, url)`
+    es la función síncrona que raspa y guarda una sección. El tiempo total queda
+    acotado por el sitio más lento, no por la suma de todos.
+    """
+    jobs = [
+        (site, section, url)
+        for site, spec in sites.items()
+        for section, url in spec['sections'].items()
+    ]
+    if not jobs:
+        return
+
+    apply_site_policies(sites)
+    start_rendering(sites)
+
+    semaphores = {
+        site: asyncio.Semaphore(spec.get('concurrency') or DEFAULT_CONCURRENCY)
+        for site, spec in sites.items()
+    }
+
+    loop = asyncio.get_running_loop()
+    # Un hilo por sección: el executor por defecto de asyncio es demasiado pequeño
+    # en máquinas con pocos núcleos y serializaría sitios que no tienen relación.
+    with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix='crawl') as executor:
+        await asyncio.gather(*(
+            _run_section(loop, executor, semaphores[site], process_section, site, section, url)
+            for site, section, url in jobs
+        ))
+
+
+async def _wait(stop, seconds):
+    """Duerme `seconds` o hasta que se pida parar; devuelve True si hay que parar."""
+    try:
+        await asyncio.wait_for(stop.wait(), timeout=seconds)
+    except asyncio.TimeoutError:
+        return False
+    return True
+
+
+async def _serve_section(loop, executor, semaphore, process_section, schedule, stop, site, section, url):
+    """Visita una sección una y otra vez; entre visitas espera lo que diga `schedule`."""
+    delay = schedule.first_delay(site, section)
+    while not await _wait(stop, delay):
+        urls = await _run_section(loop, executor, semaphore, process_section, site, section, url)
+        delay = schedule.record(site, section, urls)
+
+
+async def serve(sites, process_section, schedule, stop, on_cycle=None, cycle_seconds=None):
+    """
+    Modo daemon: cada sección corre en su propio ciclo, con el intervalo que le asigna
+    `schedule` (scheduler.Schedule) a partir de las URLs que devuelve
+    `process_section(site, section, url)`. El proceso, las sesiones HTTP, los Chrome
+    del pool y los procesos de extracción se mantienen vivos entre visitas.
+
+    Corre hasta que se active `stop` (asyncio.Event); las secciones en curso terminan
+    su visita. Si se da `on_cycle`, se llama cada `cycle_seconds` (y una última vez al
+    parar) en un hilo aparte, para cerrar los reportes del periodo.
+    """
+    jobs = [
+        (site, section, url)
+        for site, spec in sites.items()
+        for section, url in spec['sections'].items()
+    ]
+    if not jobs:
+        return
+
+    # Sin prerender: cada sección abre su pestaña cuando le toca en el Chrome ya caliente
+    apply_site_policies(sites)
+
+    semaphores = {
+        site: asyncio.Semaphore(spec.get('concurrency') or DEFAULT_CONCURRENCY)
+        for site, spec in sites.items()
+    }
+
+    loop = asyncio.get_running_loop()
+
+    async def cycles():
+        while not await _wait(stop, cycle_seconds):
+            await loop.run_in_executor(None, on_cycle)
+
+    with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix='crawl') as executor:
+        tasks = [
+            _serve_section(loop, executor, semaphores[site], process_section, schedule, stop, site, section, url)
+            for site, section, url in jobs
+        ]
+        if on_cycle and cycle_seconds:
+            tasks.append(cycles())
+        await asyncio.gather(*tasks)
+    if on_cycle:
+        await loop.run_in_executor(None, on_cycle)
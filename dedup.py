@@ -0,0 +1,185 @@
+# dedup.py
+import hashlib
+import os
+import re
+import threading
+import time
+from array import array
+
+from utils import CACHE_DIR, open_sqlite
+
+# Índice de casi-duplicados (notas de agencia como EFE o Reuters que varios periódicos
+# publican casi iguales). Cada texto limpio se resume en una firma MinHash de sus
+# shingles de palabras: la fracción de posiciones iguales entre dos firmas estima la
+# similitud de Jaccard de los textos. Para no comparar contra todo el archivo, la firma
+# se parte en BANDS bandas de ROWS valores (LSH): solo se comparan las notas que
+# coinciden completa en alguna banda, una búsqueda indexada en SQLite.
+DB_PATH = os.path.join(CACHE_DIR, "dedup.sqlite3")
+
+# Con 16 bandas de 4, dos textos con Jaccard 0.7 chocan en alguna banda el 99% de las
+# veces y dos con 0.3, el 12% (esos se descartan al comparar las firmas)
+BANDS = 16
+ROWS = 4
+NUM_PERM = BANDS * ROWS
+SIMILARITY = 0.7
+
+# Palabras por shingle y mínimo de palabras para que la firma sea confiable
+SHINGLE = 3
+MIN_WORDS = 40
+
+# Permutaciones (a*h + b) mod primo, fijas para que las firmas sirvan entre corridas
+_PRIME = (1 << 61) - 1
+_PERMS = [
+    (int.from_bytes(hashlib.blake2b(b"a%d" % i, digest_size=8).digest(), "big") % (_PRIME - 1) + 1,
+     int.from_bytes(hashlib.blake2b(b"b%d" % i, digest_size=8).digest(), "big") % _PRIME)
+    for i in range(NUM_PERM)
+]
+
+# Qué hacer al escribir un duplicado: 'flag' lo marca (duplicado_de) y lo escribe,
+# 'collapse' no lo escribe, 'off' no consulta el índice
+MODES = ('flag', 'collapse', 'off')
+MODE = os.environ.get("RSS_DEDUP", "flag")
+
+_WORD = re.compile(r"\w+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    url TEXT PRIMARY KEY,
+    signature BLOB NOT NULL,
+    cluster TEXT NOT NULL,
+    site TEXT,
+    seen_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fingerprints_cluster ON fingerprints (cluster, seen_at);
+CREATE TABLE IF NOT EXISTS bands (
+    band INTEGER NOT NULL,
+    value INTEGER NOT NULL,
+    url TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bands_lookup ON bands (band, value);
+"""
+
+_conn = None
+_lock = threading.Lock()
+
+
+def _connect():
+    global _conn
+    if _conn is None:
+        # Una conexión compartida entre los hilos del crawler, protegida por _lock
+        _conn = open_sqlite(DB_PATH, _SCHEMA)
+    return _conn
+
+
+def set_mode(mode):
+    global MODE
+    if mode not in MODES:
+        raise ValueError(f"modo de duplicados desconocido: {mode}")
+    MODE = mode
+
+
+def signature(text):
+    """Firma MinHash (NUM_PERM enteros) de los shingles del texto, o None si es muy corto."""
+    words = _WORD.findall((text or "").lower())
+    if len(words) < MIN_WORDS:
+        return None
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+        for s in {" ".join(words[i:i + SHINGLE]) for i in range(len(words) - SHINGLE + 1)}
+    ]
+    return array("Q", (min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS))
+
+
+def similarity(sig, other):
+    """Jaccard estimado entre dos firmas."""
+    return sum(x == y for x, y in zip(sig, other)) / NUM_PERM
+
+
+def _bands(sig):
+    """(banda, valor) de cada banda; el valor es un hash de sus ROWS posiciones."""
+    return [
+        (band, int.from_bytes(hashlib.blake2b(sig[band * ROWS:(band + 1) * ROWS].tobytes(),
+                                              digest_size=8).digest(), "big", signed=True))
+        for band in range(BANDS)
+    ]
+
+
+def _load(blob):
+    sig = array("Q")
+    sig.frombytes(blob)
+    return sig
+
+
+def _nearest(conn, url, sig):
+    """(similitud, cluster) de la nota indexada más parecida, o None si ninguna se parece."""
+    candidates = set()
+    for band, value in _bands(sig):
+        candidates.update(row[0] for row in conn.execute(
+            "SELECT url FROM bands WHERE band = ? AND value = ?", (band, value)))
+    candidates.discard(url)
+
+    best = None
+    for other in candidates:
+        row = conn.execute("SELECT signature, cluster FROM fingerprints WHERE url = ?", (other,)).fetchone()
+        if row is None:
+            continue
+        score = similarity(sig, _load(row[0]))
+        if score >= SIMILARITY and (best is None or score > best[0]):
+            best = (score, row[1])
+    return best
+
+
+def assign(url, text, site=None):
+    """
+    Indexa la nota y devuelve (cluster, url original): el cluster es el id de la
+    historia a la que pertenece y la url original es la primera nota que se vio de
+    ese cluster, o None si es esta misma. Sin firma (texto corto) devuelve (None, None).
+    """
+    sig = signature(text)
+    if not url or sig is None:
+        return None, None
+    blob = sig.tobytes()
+
+    with _lock:
+        conn = _connect()
+        row = conn.execute("SELECT signature, cluster FROM fingerprints WHERE url = ?", (url,)).fetchone()
+        if row is not None and row[0] == blob:
+            cluster = row[1]
+        else:
+            bands = _bands(sig)
+            nearest = _nearest(conn, url, sig)
+            # Una historia nueva toma como id el hash de la URL de su primera nota: no puede
+            # depender del contenido, o una nota distinta que solo choque en una banda
+            # heredaría el cluster (y el duplicado_de) de otra historia
+            cluster = nearest[1] if nearest else hashlib.blake2b(url.encode("utf-8"), digest_size=8).hexdigest()
+            conn.execute("DELETE FROM bands WHERE url = ?", (url,))
+            conn.executemany(
+                "INSERT INTO bands (band, value, url) VALUES (?, ?, ?)",
+                [(band, value, url) for band, value in bands],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO fingerprints (url, signature, cluster, site, seen_at) "
+                "VALUES (?, ?, ?, ?, COALESCE((SELECT seen_at FROM fingerprints WHERE url = ?), ?))",
+                (url, blob, cluster, site, url, time.time()),
+            )
+            conn.commit()
+        first = conn.execute(
+            "SELECT url FROM fingerprints WHERE cluster = ? ORDER BY seen_at, url LIMIT 1", (cluster,)
+        ).fetchone()[0]
+    return cluster, (first if first != url else None)
+
+
+def annotate(item, site=None):
+    """
+    Agrega al artículo su 'cluster' y, si es copia de otra nota ya vista,
+    'duplicado_de'. Devuelve False si en modo 'collapse' no debe escribirse.
+    """
+    if MODE == 'off':
+        return True
+    cluster, original = assign(item.get("url"), item.get("texto"), site)
+    if cluster:
+        item["cluster"] = cluster
+    if original:
+        item["duplicado_de"] = original
+        return MODE != 'collapse'
+    return True
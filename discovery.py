@@ -0,0 +1,218 @@
+# discovery.py
+import email.utils
+import logging
+import os
+from datetime import datetime, timezone
+
+from lxml import etree
+
+from canonical import canonical_url
+from extraction import html_to_text
+from fetch import fetch_cached
+import metrics
+from utils import clean_article_text, ordered_unique
+
+log = logging.getLogger(__name__)
+
+# Feed de cada sección, configurado desde el registro (sites.SITES[...]['feeds']):
+#   {url de la sección: {'url': url del feed, 'match': texto que debe tener la URL de la nota}}
+# Sirve RSS 2.0, Atom y sitemaps de Google News (urlset con news:publication_date / lastmod).
+FEEDS = {}
+
+# Feeds declarados con 'trial': True en el registro (URLs que todavía no se verificaron
+# contra el sitio): solo se usan con RSS_TRIAL_FEEDS=1 o main.py --trial-feeds
+TRIAL_FEEDS = os.environ.get("RSS_TRIAL_FEEDS", "0") == "1"
+
+# Entradas más recientes que se toman de un feed: un sitemap de noticias puede listar
+# las notas de 48 horas de todo el sitio
+MAX_ENTRIES = 30
+
+_PARSER = etree.XMLParser(recover=True, resolve_entities=False, no_network=True, huge_tree=True)
+
+
+def set_trial_feeds(enabled):
+    global TRIAL_FEEDS
+    TRIAL_FEEDS = enabled
+
+
+def configure(section_url, feed):
+    """
+    Registra el feed de una sección; `feed` es la URL o un dict {'url', 'match', 'trial'}.
+    Los feeds de prueba se ignoran salvo con TRIAL_FEEDS.
+    """
+    if isinstance(feed, str):
+        feed = {'url': feed}
+    if feed.get('trial') and not TRIAL_FEEDS:
+        FEEDS.pop(section_url, None)
+        return
+    FEEDS[section_url] = feed
+
+
+def _local(el):
+    return etree.QName(el).localname if isinstance(el.tag, str) else None
+
+
+def _child(el, *names):
+    """Primer hijo directo cuyo nombre local esté en `names` (sin importar el namespace)."""
+    for child in el:
+        if _local(child) in names:
+            return child
+    return None
+
+
+def _text(el, *names):
+    child = _child(el, *names)
+    if child is None or child.text is None:
+        return None
+    return child.text.strip() or None
+
+
+def _parse_date(value):
+    """Fecha de un feed (RFC 822 en RSS, ISO 8601 en Atom y sitemaps) como datetime con zona."""
+    if not value:
+        return None
+    try:
+        date = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            date = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    return date if date.tzinfo else date.replace(tzinfo=timezone.utc)
+
+
+def _rss_item(item):
+    image = None
+    for child in item:
+        if _local(child) in ("content", "thumbnail", "enclosure") and child.get("url"):
+            if child.get("medium", "image") == "image" and child.get("type", "image/").startswith("image/"):
+                image = child.get("url")
+                break
+    return {
+        "url": _text(item, "link"),
+        "title": _text(item, "title"),
+        "published": _parse_date(_text(item, "pubDate", "date")),
+        # content:encoded trae la nota completa en muchos CMS (WordPress, Arc...)
+        "content": _text(item, "encoded"),
+        "image": image,
+    }
+
+
+def _atom_entry(entry):
+    url = None
+    for link in entry:
+        if _local(link) == "link" and link.get("rel", "alternate") == "alternate":
+            url = link.get("href")
+            break
+    content = _child(entry, "content")
+    return {
+        "url": url,
+        "title": _text(entry, "title"),
+        "published": _parse_date(_text(entry, "published", "updated")),
+        "content": content.text if content is not None and content.get("type") in ("html", "xhtml") else None,
+        "image": None,
+    }
+
+
+def _sitemap_url(url):
+    news = _child(url, "news")
+    image = _child(url, "image")
+    return {
+        "url": _text(url, "loc"),
+        "title": _text(news, "title") if news is not None else None,
+        "published": _parse_date(
+            (_text(news, "publication_date") if news is not None else None) or _text(url, "lastmod")
+        ),
+        "content": None,
+        "image": _text(image, "loc") if image is not None else None,
+    }
+
+
+def parse_feed(data):
+    """
+    Entradas de un feed RSS/Atom o de un sitemap de noticias, de la más nueva a la más vieja.
+    Cada entrada es {url, title, published (datetime o None), content (HTML o None), image}.
+    """
+    root = etree.fromstring(data, _PARSER)
+    if root is None:
+        return []
+    kind = _local(root)
+    if kind == "rss" or kind == "RDF":
+        entries = [_rss_item(el) for el in root.iter() if _local(el) == "item"]
+    elif kind == "feed":
+        entries = [_atom_entry(el) for el in root if _local(el) == "entry"]
+    elif kind == "urlset":
+        entries = [_sitemap_url(el) for el in root if _local(el) == "url"]
+    else:
+        return []
+    entries = [dict(e, url=canonical_url(e["url"])) for e in entries if e["url"]]
+    # sorted es estable: las entradas sin fecha conservan el orden del feed, al final
+    oldest = datetime.min.replace(tzinfo=timezone.utc)
+    return sorted(entries, key=lambda e: e["published"] or oldest, reverse=True)
+
+
+def fetch_entries(feed_url, match=None):
+    """Descarga y parsea un feed; con `match`, solo las notas cuya URL lo contiene."""
+    r = fetch_cached(feed_url)
+    r.raise_for_status()
+    entries = parse_feed(r.content)
+    if match:
+        entries = [e for e in entries if match in e["url"]]
+    return entries
+
+
+def section_entries(section_url):
+    """
+    {url de la nota: entrada} de las MAX_ENTRIES notas más recientes del feed de la
+    sección, o {} si la sección no tiene feed o falló. Si no alcanza (needs_listing),
+    el scraper completa con la portada (merge_links).
+    """
+    feed = FEEDS.get(section_url)
+    if not feed:
+        return {}
+    try:
+        entries = fetch_entries(feed['url'], feed.get('match'))
+    except Exception as e:
+        metrics.inc("discovery_failures_total")
+        log.warning("Feed no disponible para %s (%s): %s", section_url, feed['url'], e)
+        return {}
+    entries = entries[:MAX_ENTRIES]
+    metrics.inc("discovery_entries_total", len(entries))
+    return {e["url"]: e for e in entries}
+
+
+def needs_listing(feed, max_articles):
+    """
+    True si además del feed hay que leer la portada: no hay feed, o trae menos notas de
+    las que pide la sección (`max_articles`; None = todas las de la portada).
+    """
+    return not max_articles or len(feed) < max_articles
+
+
+def merge_links(feed, listing, base_url=None):
+    """Las notas del feed primero y después las de la portada que no estén ya."""
+    if not feed:
+        return listing
+    return ordered_unique(list(feed) + list(listing), base_url=base_url)
+
+
+def feed_item(entry, site=None, min_length=0):
+    """
+    Artículo armado directamente con el content:encoded del feed, o None si la entrada
+    no trae el cuerpo (o es más corto que `min_length`) y hay que descargar la nota.
+    """
+    if not entry or not entry.get("content"):
+        return None
+    with metrics.timer("extract_seconds"):
+        text = html_to_text(entry["content"])
+    if not text or (min_length and len(text) < min_length):
+        return None
+    with metrics.timer("clean_seconds"):
+        texto = clean_article_text(text, site=site)
+    metrics.inc("articles_from_feed_total")
+    return {
+        "url": entry["url"],
+        "titulo": entry.get("title") or "",
+        "texto": texto,
+        "imagen_url": entry.get("image"),
+    }
@@ -0,0 +1,69 @@
+# extract_pool.py
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Procesos que parsean y limpian las notas (newspaper + limpieza son CPU puro y,
+# en los hilos del crawler, el GIL los serializaba). 0 = todo en el proceso principal.
+WORKERS = int(os.environ.get("RSS_WORKERS", os.cpu_count() or 1))
+
+_executor = None
+_lock = threading.Lock()
+
+
+def set_workers(workers):
+    """Cambia el número de procesos; debe llamarse antes de extraer la primera nota."""
+    global WORKERS
+    WORKERS = max(0, int(workers))
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None and WORKERS > 0:
+            # spawn y no fork: el proceso principal ya tiene hilos (crawler, Selenium)
+            # y un fork podría heredar locks tomados por ellos.
+            _executor = ProcessPoolExecutor(
+                max_workers=WORKERS, mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _discard(executor):
+    global _executor
+    with _lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run(fn, *args):
+    """
+    Ejecuta fn(*args) en un proceso del pool y espera el resultado; el hilo que llama
+    queda libre del GIL mientras tanto. `fn` y sus argumentos deben poder serializarse
+    (funciones de módulo, functools.partial, str, dict...).
+    """
+    executor = _get_executor()
+    if executor is None:
+        return fn(*args)
+    try:
+        return executor.submit(fn, *args).result()
+    except BrokenProcessPool:
+        # Un proceso murió (p. ej. lxml con un HTML patológico): se descarta el pool
+        # entero y la siguiente nota arranca uno nuevo.
+        _discard(executor)
+        raise
+
+
+def shutdown():
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown)
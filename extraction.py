@@ -0,0 +1,117 @@
+# extraction.py
+import time
+from functools import lru_cache
+
+import lxml.html
+from lxml.cssselect import CSSSelector
+from newspaper import Article
+
+from utils import clean_article_text
+
+# Cada nota se parsea una sola vez: newspaper construye el árbol lxml y, antes de
+# limpiarlo para sacar el texto, guarda una copia intacta en `article.clean_doc`.
+# Las búsquedas propias de cada sitio (imágenes, meta, fallbacks) trabajan sobre esa
+# copia con los helpers de abajo en lugar de volver a parsear `article.html`.
+
+
+def parse_article(url, html, language=None):
+    """Parsea un HTML ya descargado con newspaper y devuelve el Article."""
+    article = Article(url, language=language) if language else Article(url)
+    article.download(input_html=html)
+    article.parse()
+    return article
+
+
+def extract(hook, url, html, language=None):
+    """
+    Trabajo de un proceso de extract_pool: parsea `html` una sola vez y devuelve
+    (lo que entregue `hook(url, article)`, segundos por etapa). El resultado del
+    hook suele ser el dict compacto de la nota; los tiempos van a metrics en el
+    proceso principal (aquí no se pueden registrar).
+    """
+    start = time.perf_counter()
+    article = parse_article(url, html, language)
+    parsed = time.perf_counter()
+    result = hook(url, article)
+    return result, {"parse": parsed - start, "extract": time.perf_counter() - parsed}
+
+
+def article_item(url, article, site=None, min_length=0):
+    """
+    Hook genérico: {url, titulo, texto, imagen_url} con el texto ya limpio para `site`,
+    o None si newspaper sacó menos de `min_length` caracteres de texto.
+    """
+    text = article.text or ""
+    if min_length and len(text) < min_length:
+        return None
+    return {
+        "url": url,
+        "titulo": article.title,
+        "texto": clean_article_text(text, site=site),
+        "imagen_url": article.top_image,
+    }
+
+
+def document(article):
+    """Árbol lxml completo de la nota (sin la limpieza de newspaper), o None."""
+    return article.clean_doc
+
+
+@lru_cache(maxsize=None)
+def _selector(css):
+    return CSSSelector(css, translator="html")
+
+
+def select(node, css):
+    """Elementos bajo `node` que cumplen el selector CSS, en orden de documento."""
+    return _selector(css)(node)
+
+
+def select_one(node, css):
+    found = select(node, css)
+    return found[0] if found else None
+
+
+def meta_content(doc, *keys):
+    """content del primer <meta property=...> o <meta name=...> de `keys` que lo tenga."""
+    for key in keys:
+        for meta in select(doc, f'meta[property="{key}"], meta[name="{key}"]'):
+            content = (meta.get("content") or "").strip()
+            if content:
+                return content
+    return None
+
+
+def node_text(node, separator=" "):
+    """Texto de un elemento con cada fragmento recortado (como get_text(sep, strip=True))."""
+    return separator.join(t.strip() for t in node.itertext() if t.strip())
+
+
+# Bloques que newspaper separa en párrafos y elementos que no aportan texto
+BLOCK_TAGS = ("p", "h1", "h2", "h3", "h4", "h5", "h6", "li", "blockquote", "pre")
+SKIP_TAGS = ("script", "style", "noscript", "iframe", "figure", "form")
+
+
+def html_to_text(html):
+    """
+    Texto plano de un fragmento HTML, p. ej. el content.rendered de WordPress:
+    un párrafo por bloque separado por líneas en blanco, como el .text de newspaper.
+    """
+    if not html or not html.strip():
+        return ""
+    root = lxml.html.fragment_fromstring(html, create_parent="div")
+    for el in list(root.iter(*SKIP_TAGS)):
+        el.drop_tree()
+
+    paragraphs = []
+    for el in root.iter(*BLOCK_TAGS):
+        # Un <p> dentro de un <blockquote> o <li> ya va en el texto del bloque de afuera
+        if any(parent.tag in BLOCK_TAGS for parent in el.iterancestors()):
+            continue
+        text = " ".join(el.text_content().split())
+        if text:
+            paragraphs.append(text)
+    if not paragraphs:
+        text = " ".join(root.text_content().split())
+        return text
+    return "\n\n".join(paragraphs)
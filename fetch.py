@@ -0,0 +1,228 @@
+# fetch.py
+import threading
+import time
+from concurrent.futures import Future
+from urllib.parse import urlparse
+
+from newspaper.parsers import Parser
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import archive
+from canonical import canonical_url
+import rate_limit
+import http_cache
+import extract_pool
+import metrics
+import profiling
+from extraction import extract
+
+UA = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/124.0.0.0 Safari/537.36"
+)
+
+# Cabeceras comunes para todos los sitios. Algunos WAFs exigen Accept/Language razonables.
+DEFAULT_HEADERS = {
+    "User-Agent": UA,
+    "Accept": "text/html,application/xhtml+xml,application/json;q=0.9,*/*;q=0.8",
+    "Accept-Language": "es-MX,es;q=0.9,en;q=0.8",
+}
+
+DEFAULT_TIMEOUT = 25
+
+# Timeout por host, declarado por cada sitio en sites.SITES
+HOST_TIMEOUTS = {}
+
+# Conexiones keep-alive que se conservan por host (una por hilo concurrente, con holgura)
+POOL_SIZE = 10
+
+# requests decodifica como ISO-8859-1 cuando el servidor no declara charset
+FAIL_ENCODING = "ISO-8859-1"
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+# Notas pedidas en esta corrida: {(url canónica, hook, idioma): Future(resultado)}.
+# Si otra sección pide la misma nota, espera o reutiliza esa descarga y ese parseo.
+_articles = {}
+_articles_lock = threading.Lock()
+
+
+def _new_session():
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,  # el llamador decide qué hacer con el último status
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retry)
+
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session(url):
+    """
+    Devuelve la sesión compartida del host de `url`, creándola la primera vez.
+    Reutilizar la sesión conserva las conexiones TCP/TLS abiertas entre peticiones.
+    """
+    host = urlparse(url).netloc.lower()
+    session = _sessions.get(host)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(host)
+            if session is None:
+                session = _sessions[host] = _new_session()
+    return session
+
+
+def set_timeout(url, seconds):
+    """Fija el timeout por defecto de las peticiones al host de `url`."""
+    HOST_TIMEOUTS[urlparse(url).netloc.lower()] = seconds
+
+
+def fetch(url, **kwargs):
+    """
+    GET con la sesión del host, cabeceras por defecto y reintentos.
+    Respeta la política de ritmo del host (rate_limit) antes de salir a la red.
+    Acepta los mismos argumentos que requests.get (headers, params, timeout...).
+    Cada respuesta queda en el archivo (archive); en modo replay sale de ahí, sin red.
+    """
+    if archive.REPLAY:
+        return archive.replay(url, kwargs.get("params"))
+    host = urlparse(url).netloc.lower()
+    kwargs.setdefault("timeout", HOST_TIMEOUTS.get(host, DEFAULT_TIMEOUT))
+    rate_limit.acquire(url)
+    start = time.perf_counter()
+    try:
+        with profiling.stage("descarga"):
+            response = get_session(url).get(url, **kwargs)
+    except Exception:
+        metrics.inc("http_requests_total", host=host, status="error")
+        raise
+    finally:
+        metrics.observe("http_request_seconds", time.perf_counter() - start, host=host)
+    metrics.inc("http_requests_total", host=host, status=response.status_code)
+    metrics.inc("http_response_bytes_total", len(response.content), host=host)
+    # Un 304 no trae cuerpo: fetch_cached archiva la copia local que termina sirviendo
+    if response.status_code != 304:
+        archive.record(url, kwargs.get("params"), response)
+    return response
+
+
+def fetch_cached(url, ttl=None, **kwargs):
+    """
+    Igual que fetch(), pero pasando por la caché HTTP en disco.
+    - Dentro del TTL la copia local se devuelve sin tocar la red.
+    - Después se revalida con If-None-Match / If-Modified-Since y un 304 se sirve de la copia.
+    Pensado para portadas de sección y llamadas al API de WordPress.
+    """
+    if archive.REPLAY:
+        return fetch(url, **kwargs)
+    if ttl is None:
+        ttl = http_cache.DEFAULT_TTL
+    key = http_cache.cache_key(url, kwargs.get("params"))
+    cached = http_cache.load(key)
+
+    if cached:
+        meta, body = cached
+        if http_cache.is_fresh(meta, ttl):
+            metrics.inc("http_cache_total", result="fresca")
+            response = http_cache.to_response(meta, body)
+            archive.record(url, kwargs.get("params"), response)
+            return response
+        headers = dict(kwargs.pop("headers", None) or {})
+        headers.update(http_cache.conditional_headers(meta))
+        kwargs["headers"] = headers
+
+    response = fetch(url, **kwargs)
+
+    if response.status_code == 304 and cached:
+        meta, body = cached
+        metrics.inc("http_cache_total", result="revalidada")
+        http_cache.touch(key, meta)
+        response = http_cache.to_response(meta, body)
+        archive.record(url, kwargs.get("params"), response)
+        return response
+
+    if response.status_code == 200:
+        http_cache.store(key, response)
+    return response
+
+
+def fetch_html(url, **kwargs):
+    """
+    Descarga una página y devuelve su HTML como texto. Lanza HTTPError si no es 2XX.
+    Decodifica igual que newspaper para que el resultado sea idéntico a Article.download().
+    """
+    response = fetch(url, **kwargs)
+    response.raise_for_status()
+
+    if response.encoding != FAIL_ENCODING:
+        return response.text or ""
+
+    html = response.content
+    if "charset" not in response.headers.get("content-type", ""):
+        encodings = requests.utils.get_encodings_from_content(response.text)
+        if encodings:
+            response.encoding = encodings[0]
+            html = response.text
+    if isinstance(html, bytes):
+        # Sin charset en la cabecera ni en la página newspaper entrega los bytes y
+        # Article.set_html los decodifica con UnicodeDammit: aquí se hace lo mismo
+        html = Parser.get_unicode_html(html)
+    return html or ""
+
+
+def extract_article(url, hook, language=None):
+    """
+    Descarga una nota en este hilo y manda el parseo, la extracción y la limpieza
+    (todo CPU) a extract_pool. `hook(url, article)` corre en el proceso de trabajo y
+    su resultado, p. ej. extraction.article_item, es lo que se devuelve.
+
+    Cada nota se descarga y se parsea una sola vez por corrida aunque la pidan varias
+    secciones a la vez (single-flight): las demás reciben el mismo resultado. Si falla,
+    todas reciben el error y no se guarda, para que un intento posterior vuelva a probar.
+    """
+    key = (canonical_url(url), hook, language)
+    with _articles_lock:
+        future = _articles.get(key)
+        owner = future is None
+        if owner:
+            future = _articles[key] = Future()
+
+    if owner:
+        try:
+            html = fetch_html(url)
+            with profiling.stage("extraccion"):
+                result, timings = extract_pool.run(extract, hook, url, html, language)
+            for stage, seconds in timings.items():
+                metrics.observe(f"{stage}_seconds", seconds)
+            future.set_result(result)
+        except BaseException as e:
+            metrics.inc("articles_dropped_total", reason="error")
+            with _articles_lock:
+                _articles.pop(key, None)
+            future.set_exception(e)
+        else:
+            if result is None:
+                # El hook la rechazó: texto demasiado corto, nota vieja...
+                metrics.inc("articles_dropped_total", reason="descartada")
+    else:
+        metrics.inc("articles_coalesced_total")
+    result = future.result()
+    # Cada sección recibe su propia copia: quien escribe puede agregarle campos (dedup)
+    return dict(result) if isinstance(result, dict) else result
+
+
+def forget_articles():
+    """Vacía la caché de notas de la corrida (la siguiente vuelve a descargarlas)."""
+    with _articles_lock:
+        _articles.clear()
@@ -0,0 +1,90 @@
+# http_cache.py
+import hashlib
+import json
+import os
+import time
+from urllib.parse import urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from utils import CACHE_DIR, write_atomic
+
+CACHE_PATH = os.path.join(CACHE_DIR, "http")
+
+# Segundos durante los que una copia local se sirve sin preguntar al servidor.
+# Pasado ese tiempo se revalida con If-None-Match / If-Modified-Since.
+DEFAULT_TTL = int(os.environ.get("RSS_HTTP_TTL", 120))
+
+
+def cache_key(url, params=None):
+    if params:
+        url = f"{url}?{urlencode(sorted(params.items()), doseq=True)}"
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+def _paths(key):
+    base = os.path.join(CACHE_PATH, key[:2], key)
+    return base + ".json", base + ".body"
+
+
+def load(key):
+    """Devuelve (meta, body) de la copia local o None si no hay."""
+    meta_path, body_path = _paths(key)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(body_path, "rb") as f:
+            body = f.read()
+    except (OSError, ValueError):
+        return None
+    return meta, body
+
+
+def store(key, response):
+    """Guarda una respuesta 200 junto con sus validadores (ETag / Last-Modified)."""
+    meta_path, body_path = _paths(key)
+    meta = {
+        "url": response.url,
+        "stored_at": time.time(),
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "encoding": response.encoding,
+        "headers": dict(response.headers),
+    }
+    # Primero el cuerpo: un meta sin cuerpo nunca debe quedar visible
+    write_atomic(body_path, response.content)
+    write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+
+def touch(key, meta):
+    """Marca la copia local como recién validada (tras un 304)."""
+    meta_path, _ = _paths(key)
+    meta = dict(meta, stored_at=time.time())
+    write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+
+def is_fresh(meta, ttl):
+    return bool(ttl) and time.time() - meta.get("stored_at", 0) < ttl
+
+
+def conditional_headers(meta):
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
+
+
+def to_response(meta, body):
+    """Reconstruye un requests.Response a partir de la copia local."""
+    response = requests.Response()
+    response.status_code = 200
+    response.reason = "OK"
+    response.url = meta.get("url")
+    response.headers = CaseInsensitiveDict(meta.get("headers") or {})
+    response.encoding = meta.get("encoding")
+    response._content = body
+    response.from_cache = True
+    return response
@@ -0,0 +1,51 @@
+# log_config.py
+import json
+import logging
+import sys
+
+import metrics
+
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s [%(site)s/%(section)s] %(name)s: %(message)s"
+
+
+class ContextFilter(logging.Filter):
+    """Agrega a cada registro el sitio y la sección en curso (ver metrics.scope)."""
+
+    def filter(self, record):
+        labels = metrics.current_labels()
+        record.site = labels.get('site', '-')
+        record.section = labels.get('section', '-')
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """Un objeto JSON por línea, para mandar el log a un agregador."""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'site': record.site,
+            'section': record.section,
+            'msg': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def configure(level="INFO", fmt="text"):
+    """
+    Configura el log del proceso. Los mensajes usan formato perezoso
+    (log.debug("... %s", x)): lo que no pasa el nivel no se llega a formatear.
+    """
+    handler = logging.StreamHandler(sys.stdout)
+    handler.addFilter(ContextFilter())
+    handler.setFormatter(JSONFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    # Librerías que hablan de más en INFO
+    for noisy in ("urllib3", "selenium", "WDM"):
+        logging.getLogger(noisy).setLevel(logging.WARNING)
@@ -1,155 +1,237 @@
 # main_scraper.py
-import requests
-from bs4 import BeautifulSoup
-from newspaper import Article
-import time
-import xml.etree.ElementTree as ET
-import os
-
-from scraper_cronica import scrape_cronica
-from scraper_noventagrados import scrape_noventagrados
-from scraper_netnoticias import scrape_netnoticias
-from scraper_excelsior import scrape_excelsior
-from scraper_forbes import scrape_forbes
-from scraper_marca import scrape_marca
-from scraper_unanimo import scrape_unanimo
-from scraper_universal import scrape_universal
-from scraper_jornada import scrape_jornada
-from scraper_sdp import scrape_sdp
-from scraper_infobae import scrape_infobae
-
-
-# Diccionario con las URLs de cada sección por periódico
-SECTIONS = {
-
-    'excelsior': {
-        'mundo': "https://www.excelsior.com.mx/global",
-        'nacional': "https://www.excelsior.com.mx/nacional",
-        'espectaculos': "https://www.excelsior.com.mx/funcion"
-    },
-
-    'cronica': {
-        'mundo': "https://www.cronica.com.mx/mundo/",
-        'nacional': "https://www.cronica.com.mx/nacional/",
-        'espectaculos': "https://www.cronica.com.mx/escenario/"
-    },
-
-    'noventagrados': {
-        'mundo': "https://www.noventagrados.com.mx/internacional.html",
-        'nacional': "https://www.noventagrados.com.mx/nacional.html",
-        'espectaculos': "https://www.noventagrados.com.mx/espectaculos.html"
-    },
-
-    'netnoticias': {
-        'mundo': "https://netnoticias.mx/internacional",
-        'nacional': "https://netnoticias.mx/nacional",
-        'espectaculos': "https://netnoticias.mx/espectaculos"
-    },
-
-    'forbes': {
-        'mundo': "https://forbes.com.mx/internacional/",
-        'nacional': "https://forbes.com.mx/forbes-politica/",
-        'espectaculos': "https://forbes.com.mx/forbes-life/all-access/"
-    },
-
-    'marca': {
-        'futbol': "https://www.marca.com/mx/futbol.html?intcmp=MENUPROD&s_kw=mx-futbol"
-    },
-
-    'unanimo': {
-        'futbol': "https://unanimodeportes.com/deportes/futbol/"
-    },
-
-    'universal': {
-        'mundo': "https://www.eluniversal.com.mx/mundo/",
-        'nacional': "https://www.eluniversal.com.mx/nacion/",
-        'espectaculos': "https://www.eluniversal.com.mx/espectaculos/"
-    },
-
-    'jornada': {
-        'espectaculos': "https://www.jornada.com.mx/categoria/espectaculos",
-        'mundo': "https://www.jornada.com.mx/categoria/mundo",
-        'capital': "https://www.jornada.com.mx/categoria/capital"
-    },
-
-    'sdp': {
-        'espectaculos': "https://www.sdpnoticias.com/espectaculos/"
-    },
-
-    'infobae': {
-        'espectaculos': "https://www.infobae.com/teleshow/"
-    },  
-}
+import logging
+import asyncio
+import argparse
+import signal
+from datetime import datetime, timedelta
+
+from sites import SITES
+from crawler import crawl, serve
+import archive
+import dedup
+import discovery
+import log_config
+import metrics
+import profiling
+import seen_store
+import extract_pool
+import fetch
+import scheduler
+from xml_writer import XMLSectionWriter
+
+log = logging.getLogger(__name__)
+
+
+def replay_cutoff(value):
+    """
+    Límite de --replay como epoch: una fecha (AAAA-MM-DD) incluye todo ese día,
+    una fecha con hora llega hasta ese momento; sin valor, la copia más reciente.
+    """
+    if not value:
+        return None
+    moment = datetime.fromisoformat(value)
+    if len(value) == 10:
+        moment += timedelta(days=1)
+    return moment.timestamp()
+
 
 def save_to_xml(data, folder_name, filename):
     """
     Guarda una lista de diccionarios en un archivo XML dentro de una carpeta específica.
     """
-    if not os.path.exists(folder_name):
-        os.makedirs(folder_name)
-
-    file_path = os.path.join(folder_name, filename)
-
-    root = ET.Element('noticias')
-
-    for articulo in data:
-        item = ET.SubElement(root, 'noticia')
-
-        ET.SubElement(item, 'url').text = articulo.get('url', '')
-        ET.SubElement(item, 'titulo').text = articulo.get('titulo', '')
-        ET.SubElement(item, 'texto').text = articulo.get('texto', '')
-        ET.SubElement(item, 'imagen_url').text = articulo.get('imagen_url', '')
-
-    tree = ET.ElementTree(root)
-    tree.write(file_path, encoding='utf-8', xml_declaration=True)
-
-    print(f"\nArtículos guardados en '{file_path}'.")
-
-
-if __name__ == "__main__":
-    for site, sections in SECTIONS.items():
-        print(f"\nIniciando extracción de {site.capitalize()}...")
+    with XMLSectionWriter(folder_name, filename) as writer:
+        for articulo in data:
+            writer.write(articulo)
 
-        for section, url in sections.items():
-            print(f"-> Raspando la sección '{section}'...")
-            articles = []
+    log.info("Artículos guardados en '%s'.", writer.path)
 
-            if site == 'cronica':
-                articles = scrape_cronica(url)
-                time.sleep(5)
 
-            elif site == 'noventagrados':
-                articles = scrape_noventagrados(url)
-
-            elif site == 'netnoticias':
-                articles = scrape_netnoticias(url)
-
-            elif site == 'excelsior':
-                articles = scrape_excelsior(url)
-
-            elif site == 'forbes':
-                articles = scrape_forbes(url)
-
-            elif site == 'marca':
-                articles = scrape_marca(url)[:10]
+def process_section(site, section, url):
+    """
+    Raspa una sección y la guarda en <site>/<section>.xml a medida que llegan los artículos.
+    Se ejecuta en paralelo con las demás secciones desde crawler.crawl. Todo lo que
+    se mida o se registre en el log mientras tanto lleva el sitio y la sección (y, con
+    --profile, queda en su propio perfil). Devuelve las URLs de las notas que entregó
+    el scraper, con las que el modo daemon ajusta cada cuánto volver.
+    """
+    # profiling.section va por fuera: con --profile cprofile espera su turno, y esa
+    # espera no debe contar en section_seconds
+    with profiling.section(site, section), metrics.scope(site=site, section=section), \
+            metrics.timer("section_seconds"):
+        return _process_section(site, section, url)
+
+
+def _process_section(site, section, url):
+    log.info("-> Raspando la sección '%s' de %s...", section, site.capitalize())
+    spec = SITES[site]
+    urls = []
+
+    with XMLSectionWriter(site, f"{section}.xml") as writer:
+        def write(articulo):
+            urls.append(articulo['url'])
+            # Cada nota se marca con su historia (cluster); en modo collapse las copias
+            # de una nota ya vista en otra URL no se escriben
+            with profiling.stage("duplicados"):
+                keep = dedup.annotate(articulo, site)
+            if keep:
+                with profiling.stage("escritura"):
+                    writer.write(articulo)
+                metrics.inc("articles_written_total")
+            else:
+                metrics.inc("articles_dropped_total", reason="duplicada")
+                log.debug("Duplicado omitido: %s (copia de %s)", articulo['url'], articulo['duplicado_de'])
 
-            elif site == 'unanimo':
-                articles = scrape_unanimo(url)[:10]
+        # El límite se pasa al scraper para que deje de descargar en cuanto lo alcanza;
+        # cada artículo se escribe en el XML en cuanto el scraper lo entrega.
+        spec['scraper'](url, max_articles=spec.get('max_articles'), on_article=write)
 
-            elif site == 'universal':                
-                articles = scrape_universal(url)
+    if writer.count:
+        log.info("%s artículos guardados en '%s'.", writer.count, writer.path)
+    else:
+        log.warning("No se pudieron extraer artículos de la sección '%s' de %s.", section, site.capitalize())
+    return urls
 
-            elif site == 'jornada':
-                articles = scrape_jornada(url)
 
-            elif site == 'sdp':
-                articles = scrape_sdp(url)[:20]
+def end_cycle(schedule, metrics_dir):
+    """
+    Cierra un periodo del daemon: escribe el reporte de métricas y empieza uno nuevo,
+    olvida las notas ya extraídas en memoria (para la siguiente visita quedan en
+    seen_store) y guarda los intervalos aprendidos.
+    """
+    log.info("Métricas del periodo en '%s'.", metrics.write_reports(metrics_dir))
+    metrics.reset()
+    fetch.forget_articles()
+    schedule.save()
+    log.debug("Intervalos: %s", {key: round(s / 60) for key, s in schedule.intervals().items()})
+
+
+async def run_daemon(schedule, metrics_dir, report_every):
+    """Corre serve() hasta recibir SIGINT o SIGTERM."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: Ctrl+C corta el proceso sin esperar a las secciones en curso
+    await serve(SITES, process_section, schedule, stop,
+                on_cycle=lambda: end_cycle(schedule, metrics_dir), cycle_seconds=report_every)
 
-            elif site == 'infobae':
-                articles = scrape_infobae(url)[:25] 
 
-            if articles:
-                filename = f"{section}.xml"
-                save_to_xml(articles, site, filename)
-            else:
-                print(f"No se pudieron extraer artículos de la sección '{section}' de {site.capitalize()}.")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extrae noticias de las secciones configuradas en sites.SITES.")
+    parser.add_argument(
+        "--refresh-older-than", type=float, metavar="HORAS",
+        help="Vuelve a descargar los artículos ya vistos con más de HORAS de antigüedad "
+             "(por defecto se reutilizan siempre)."
+    )
+    parser.add_argument(
+        "--workers", type=int, metavar="N",
+        help="Procesos para parsear y limpiar las notas (por defecto, uno por núcleo; "
+             "0 = en el proceso principal)."
+    )
+    parser.add_argument(
+        "--replay", nargs="?", const="", metavar="FECHA",
+        help="Vuelve a procesar lo ya descargado sin tocar la red, desde el archivo de "
+             "respuestas (archive). Con FECHA (AAAA-MM-DD o AAAA-MM-DDTHH:MM) se usa lo "
+             "descargado hasta entonces; sin ella, la copia más reciente."
+    )
+    parser.add_argument(
+        "--dedup", choices=dedup.MODES, default=dedup.MODE,
+        help="Notas casi idénticas ya vistas en otra URL (p. ej. de agencias): 'flag' las "
+             "marca con duplicado_de, 'collapse' no las escribe, 'off' no las busca."
+    )
+    parser.add_argument(
+        "--no-archive", action="store_true",
+        help="No guarda las respuestas descargadas en el archivo."
+    )
+    parser.add_argument(
+        "--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Nivel del log (DEBUG muestra cada nota extraída)."
+    )
+    parser.add_argument(
+        "--log-format", default="text", choices=["text", "json"],
+        help="Formato del log: texto o una línea JSON por mensaje."
+    )
+    parser.add_argument(
+        "--metrics-dir", default=metrics.METRICS_DIR, metavar="DIR",
+        help="Carpeta del reporte JSON de la corrida y del textfile de Prometheus."
+    )
+    parser.add_argument(
+        "--profile", nargs="?", const="cprofile", choices=profiling.MODES, metavar="MODO",
+        help="Perfila la corrida por sitio y sección: 'cprofile' (por defecto) guarda .pstats "
+             "y raspa las secciones de a una, "
+             "'sample' muestrea las pilas cada pocos ms (incluye esperas de red y Selenium) "
+             "y guarda pilas .folded para flamegraph."
+    )
+    parser.add_argument(
+        "--profile-dir", default=profiling.PROFILE_DIR, metavar="DIR",
+        help="Carpeta de los perfiles y del resumen top.txt."
+    )
+    parser.add_argument(
+        "--profile-top", type=int, default=30, metavar="N",
+        help="Funciones más pesadas que se listan en top.txt."
+    )
+    parser.add_argument(
+        "--daemon", action="store_true",
+        help="No termina: vuelve a visitar cada sección con un intervalo propio que se "
+             "ajusta a cuántas notas nuevas publica (ver scheduler.py)."
+    )
+    parser.add_argument(
+        "--min-interval", type=float, default=scheduler.MIN_INTERVAL / 60, metavar="MIN",
+        help="Con --daemon, minutos mínimos entre dos visitas a una sección."
+    )
+    parser.add_argument(
+        "--max-interval", type=float, default=scheduler.MAX_INTERVAL / 60, metavar="MIN",
+        help="Con --daemon, minutos máximos entre dos visitas a una sección."
+    )
+    parser.add_argument(
+        "--report-every", type=float, default=60, metavar="MIN",
+        help="Con --daemon, cada cuántos minutos se escribe el reporte de métricas."
+    )
+    parser.add_argument(
+        "--trial-feeds", action="store_true",
+        help="Usa también los feeds marcados como 'trial' en sites.SITES (sin verificar)."
+    )
+    args = parser.parse_args()
+
+    log_config.configure(args.log_level, args.log_format)
+
+    dedup.set_mode(args.dedup)
+
+    if args.trial_feeds:
+        discovery.set_trial_feeds(True)
+
+    if args.no_archive:
+        archive.set_enabled(False)
+
+    if args.workers is not None:
+        extract_pool.set_workers(args.workers)
+    elif args.profile:
+        # El parseo en otros procesos no aparece en el perfil: se hace en el principal
+        extract_pool.set_workers(0)
+        log.info("Perfilando: parseo en el proceso principal (usa --workers para cambiarlo).")
+
+    if args.profile:
+        profiling.start(args.profile, args.profile_dir)
+
+    if args.refresh_older_than is not None:
+        seen_store.set_max_age(args.refresh_older_than * 3600)
+
+    if args.replay is not None:
+        archive.set_replay(replay_cutoff(args.replay))
+        # Se vuelve a extraer todo lo archivado en lugar de reutilizar los textos ya vistos
+        seen_store.set_max_age(0)
+
+    if args.daemon:
+        schedule = scheduler.Schedule(SITES, min_interval=args.min_interval * 60,
+                                      max_interval=args.max_interval * 60)
+        log.info("Iniciando daemon con %s sitios...", len(SITES))
+        asyncio.run(run_daemon(schedule, args.metrics_dir, args.report_every * 60))
+        log.info("Daemon detenido.")
+    else:
+        log.info("Iniciando extracción de %s sitios en paralelo...", len(SITES))
+        asyncio.run(crawl(SITES, process_section))
+        log.info("Métricas de la corrida en '%s'.", metrics.write_reports(args.metrics_dir))
+    if args.profile:
+        log.info("Perfil de la corrida en '%s'.", profiling.finish(args.profile_top))
@@ -0,0 +1,198 @@
+# metrics.py
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import utils
+
+# Métricas de una corrida: contadores e histogramas con etiquetas (sitio, sección,
+# host, status...). Al terminar, main.py las vuelca en un reporte JSON y en un
+# textfile de Prometheus (para el textfile collector de node_exporter).
+METRICS_DIR = os.environ.get("RSS_METRICS_DIR", "metrics")
+
+# Prefijo de las métricas en Prometheus
+PREFIX = "rss_"
+
+# Límites superiores (segundos) de los histogramas; lo que pase del último cae en +Inf
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+CPU_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+BUCKETS = {
+    'parse_seconds': CPU_BUCKETS,
+    'extract_seconds': CPU_BUCKETS,
+    'clean_seconds': CPU_BUCKETS,
+    'section_seconds': (1, 5, 10, 30, 60, 120, 300, 600),
+}
+
+# Etiquetas que se agregan solas a todo lo que se mide dentro de scope()
+_scope = contextvars.ContextVar("metrics_scope", default={})
+
+_counters = {}
+_histograms = {}
+_lock = threading.Lock()
+_started = time.time()
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in {**_scope.get(), **labels}.items()))
+
+
+@contextmanager
+def scope(**labels):
+    """Todo lo que se mida (y se registre en el log) dentro del bloque lleva estas etiquetas."""
+    token = _scope.set({**_scope.get(), **labels})
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def current_labels():
+    return _scope.get()
+
+
+def inc(name, value=1, **labels):
+    """Suma `value` al contador `name`."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    """Registra una medición (p. ej. segundos) en el histograma `name`."""
+    key = _key(name, labels)
+    bounds = BUCKETS.get(name, LATENCY_BUCKETS)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = {'buckets': [0] * (len(bounds) + 1), 'sum': 0.0, 'count': 0}
+        for i, bound in enumerate(bounds):
+            if value <= bound:
+                break
+        else:
+            i = len(bounds)
+        hist['buckets'][i] += 1
+        hist['sum'] += value
+        hist['count'] += 1
+
+
+@contextmanager
+def timer(name, **labels):
+    """Mide lo que tarda el bloque en el histograma `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def reset():
+    """Empieza una corrida nueva (modo daemon)."""
+    global _started
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _started = time.time()
+
+
+# --- Reportes -----------------------------------------------------------------
+
+def _snapshot():
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: {'buckets': list(h['buckets']), 'sum': h['sum'], 'count': h['count']}
+                      for k, h in _histograms.items()}
+    return counters, histograms
+
+
+def _sections(counters):
+    """Resumen por sitio/sección de los contadores que llevan esas etiquetas."""
+    summary = {}
+    for (name, labels), value in counters.items():
+        labels = dict(labels)
+        if 'site' not in labels or 'section' not in labels:
+            continue
+        entry = summary.setdefault(f"{labels['site']}/{labels['section']}", {})
+        if name == 'articles_dropped_total':
+            drops = entry.setdefault('descartados', {})
+            drops[labels.get('reason', '?')] = drops.get(labels.get('reason', '?'), 0) + value
+        else:
+            entry[name] = entry.get(name, 0) + value
+    for entry in summary.values():
+        found = entry.get('links_found_total')
+        if found:
+            entry['guardados_por_enlace'] = round(entry.get('articles_written_total', 0) / found, 3)
+    return dict(sorted(summary.items()))
+
+
+def report():
+    """Reporte de la corrida como dict (lo que se guarda en el JSON)."""
+    counters, histograms = _snapshot()
+    now = time.time()
+    return {
+        'started_at': _started,
+        'finished_at': now,
+        'duration_seconds': round(now - _started, 3),
+        'sections': _sections(counters),
+        'counters': [
+            {'name': name, 'labels': dict(labels), 'value': value}
+            for (name, labels), value in sorted(counters.items())
+        ],
+        'histograms': [
+            {'name': name, 'labels': dict(labels), 'count': h['count'], 'sum': round(h['sum'], 6),
+             'buckets': dict(zip([str(b) for b in BUCKETS.get(name, LATENCY_BUCKETS)] + ['+Inf'], h['buckets']))}
+            for (name, labels), h in sorted(histograms.items())
+        ],
+    }
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def prometheus_text():
+    """Las métricas en el formato de texto de Prometheus."""
+    counters, histograms = _snapshot()
+    lines = []
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f"# TYPE {PREFIX}{name} counter")
+        for (n, labels), value in sorted(counters.items()):
+            if n == name:
+                lines.append(f"{PREFIX}{name}{_labels_text(labels)} {value}")
+    for name in sorted({name for name, _ in histograms}):
+        bounds = BUCKETS.get(name, LATENCY_BUCKETS)
+        lines.append(f"# TYPE {PREFIX}{name} histogram")
+        for (n, labels), h in sorted(histograms.items()):
+            if n != name:
+                continue
+            cumulative = 0
+            for bound, count in zip([str(b) for b in bounds] + ['+Inf'], h['buckets']):
+                cumulative += count
+                lines.append(f"{PREFIX}{name}_bucket{_labels_text(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{PREFIX}{name}_sum{_labels_text(labels)} {h['sum']}")
+            lines.append(f"{PREFIX}{name}_count{_labels_text(labels)} {h['count']}")
+    lines.append(f"# TYPE {PREFIX}last_run_timestamp_seconds gauge")
+    lines.append(f"{PREFIX}last_run_timestamp_seconds {time.time()}")
+    return "\n".join(lines) + "\n"
+
+
+def write_reports(directory=None):
+    """
+    Escribe run-<fecha>.json (uno por corrida) y rss_scraper.prom (se reemplaza en
+    cada corrida) en `directory`. Devuelve la ruta del JSON.
+    """
+    directory = directory or METRICS_DIR
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(_started))
+    json_path = os.path.join(directory, f"run-{stamp}.json")
+    utils.write_atomic(json_path, json.dumps(report(), ensure_ascii=False, indent=2))
+    utils.write_atomic(os.path.join(directory, "rss_scraper.prom"), prometheus_text())
+    return json_path
@@ -0,0 +1,50 @@
+# parsing.py
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    # lxml viene con newspaper; si faltara, seguimos con el parser de la stdlib
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+
+def declared_encoding(response):
+    """
+    Charset que el servidor declaró en Content-Type, o None.
+    Si no lo declaró, es mejor que BeautifulSoup lo lea del <meta charset> que
+    fiarse del ISO-8859-1 que requests asume por defecto.
+    """
+    if "charset" in response.headers.get("content-type", "").lower():
+        return response.encoding
+    return None
+
+
+def class_strainer(*classes, name=None):
+    """
+    SoupStrainer para los elementos que tengan alguna de `classes`.
+    Mientras filtra, BeautifulSoup compara el atributo class entero
+    ("nota_con_imagen col-4"), así que class_='nota_con_imagen' dejaría fuera los
+    elementos con más de una clase: se busca cada clase como palabra completa.
+    """
+    pattern = re.compile(r"(?:^|\s)(?:%s)(?:\s|$)" % "|".join(map(re.escape, classes)))
+    return SoupStrainer(name, class_=pattern)
+
+
+def make_soup(markup, parse_only=None, encoding=None):
+    """
+    Parsea HTML con lxml. `markup` puede ser el texto ya decodificado (Selenium,
+    newspaper) o los bytes crudos de `response.content`; con bytes se evita que
+    `response.text` adivine el charset recorriendo todo el cuerpo.
+
+    `parse_only` (un SoupStrainer o un nombre de etiqueta) limita el árbol a lo
+    que de verdad se va a recorrer, y `encoding` es el charset de los bytes si se conoce.
+    """
+    if parse_only is not None and not isinstance(parse_only, SoupStrainer):
+        parse_only = SoupStrainer(parse_only)
+    if isinstance(markup, str):
+        encoding = None
+    return BeautifulSoup(markup, PARSER, parse_only=parse_only, from_encoding=encoding)
+
@@ -0,0 +1,224 @@
+# profiling.py
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+import metrics
+
+log = logging.getLogger(__name__)
+
+# Modo de perfilado de main.py --profile:
+#   'cprofile' -> un cProfile por sección (en el hilo que la raspa); se guarda como .pstats.
+#                 Las secciones corren de a una: Python 3.12+ admite un solo cProfile activo
+#                 a la vez, y así el perfil de cada sección no se mezcla con el de las demás
+#   'sample'   -> un hilo toma muestras de las pilas de todos los hilos cada SAMPLE_INTERVAL
+#                 segundos (tiempo de pared: también cuenta esperas de red, Selenium y sleeps)
+#                 y las guarda como pilas "folded", listas para flamegraph.pl o speedscope
+# None = apagado: section() y stage() no hacen nada y casi no cuestan.
+MODES = ('cprofile', 'sample')
+MODE = None
+PROFILE_DIR = os.environ.get("RSS_PROFILE_DIR", "profiles")
+SAMPLE_INTERVAL = 0.005
+
+# Etiqueta para los hilos que no están raspando una sección (precarga de Chrome, main...)
+OTHER = "otros"
+
+_sections = {}  # ident del hilo -> "sitio/seccion"
+_stages = {}    # ident del hilo -> pila de etapas abiertas con stage()
+_profiles = {}  # "sitio/seccion" -> cProfile.Profile
+_lock = threading.Lock()
+_section_lock = threading.Lock()  # en modo cprofile, una sección a la vez
+_sampler = None
+
+
+class _Sampler(threading.Thread):
+    """Toma muestras de la pila de cada hilo y las cuenta por sección."""
+
+    def __init__(self, interval):
+        super().__init__(name="profiler", daemon=True)
+        self.interval = interval
+        self.samples = defaultdict(Counter)  # sección -> {pila folded: muestras}
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == self.ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.reverse()
+                # Las etapas marcadas con stage() van arriba del todo: en el flamegraph
+                # cada una queda como un bloque propio
+                tags = [f"[{name}]" for name in _stages.get(ident, ())]
+                self.samples[_sections.get(ident, OTHER)][";".join(tags + stack)] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def start(mode, directory=None):
+    """Activa el perfilado para el resto de la corrida."""
+    global MODE, PROFILE_DIR, _sampler
+    if mode not in MODES:
+        raise ValueError(f"modo de perfilado desconocido: {mode}")
+    MODE = mode
+    PROFILE_DIR = directory or PROFILE_DIR
+    if mode == 'sample':
+        _sampler = _Sampler(SAMPLE_INTERVAL)
+        _sampler.start()
+    else:
+        log.info("Perfilando con cProfile: las secciones se raspan de a una.")
+
+
+@contextmanager
+def section(site, section_name):
+    """
+    Perfila por separado lo que corre en este hilo mientras se raspa la sección.
+    En modo cprofile espera a que termine la sección en curso antes de empezar.
+    """
+    if MODE is None:
+        yield
+        return
+    if MODE == 'cprofile':
+        with _section_lock:
+            with _profile_section(site, section_name):
+                yield
+        return
+    ident = threading.get_ident()
+    _sections[ident] = f"{site}/{section_name}"
+    try:
+        yield
+    finally:
+        _sections.pop(ident, None)
+
+
+@contextmanager
+def _profile_section(site, section_name):
+    label = f"{site}/{section_name}"
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError as e:
+        # Otro perfilador activo en el proceso (p. ej. corriendo bajo python -m cProfile)
+        log.warning("No se pudo perfilar %s con cProfile (%s); prueba --profile sample.", label, e)
+        profile = None
+    try:
+        yield
+    finally:
+        if profile is not None:
+            profile.disable()
+            with _lock:
+                _profiles[label] = profile
+
+
+@contextmanager
+def stage(name):
+    """
+    Marca una sub-etapa (p. ej. stage("enlaces") alrededor de _collect_links): en modo
+    sample aparece como [enlaces] en las pilas y, con cualquier modo, su tiempo de pared
+    va al histograma stage_seconds del reporte de métricas.
+    """
+    if MODE is None:
+        yield
+        return
+    stack = _stages.setdefault(threading.get_ident(), [])
+    stack.append(name)
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe("stage_seconds", time.perf_counter() - start_time, stage=name)
+        stack.pop()
+
+
+# --- Reportes -----------------------------------------------------------------
+
+def _filename(label):
+    return label.replace("/", "-")
+
+
+def _write_cprofile(directory, top):
+    with _lock:
+        profiles = dict(_profiles)
+    if not profiles:
+        return "No se registró ningún perfil."
+    merged = None
+    for label, profile in sorted(profiles.items()):
+        profile.dump_stats(os.path.join(directory, f"{_filename(label)}.pstats"))
+        stats = pstats.Stats(profile)
+        if merged is None:
+            merged = stats
+        else:
+            merged.add(stats)
+    merged.dump_stats(os.path.join(directory, "all.pstats"))
+
+    out = io.StringIO()
+    merged.stream = out
+    merged.sort_stats("cumulative").print_stats(top)
+    merged.sort_stats("tottime").print_stats(top)
+    return out.getvalue()
+
+
+def _write_folded(path, counter):
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in sorted(counter.items()):
+            f.write(f"{stack} {count}\n")
+
+
+def _top_frames(counter, top):
+    """Funciones con más muestras propias (la hoja de la pila) y acumuladas (en cualquier nivel)."""
+    own, inclusive, stages = Counter(), Counter(), Counter()
+    for stack, count in counter.items():
+        frames = stack.split(";")
+        own[frames[-1]] += count
+        for frame in set(frames):
+            inclusive[frame] += count
+        # La etapa más interna es la que se lleva la muestra
+        tags = [frame for frame in frames if frame.startswith("[")]
+        stages[tags[-1] if tags else "[sin etapa]"] += count
+    total = sum(counter.values()) or 1
+    lines = [f"{total} muestras cada {SAMPLE_INTERVAL * 1000:.0f} ms", "", "Por etapa:"]
+    lines += [f"  {n / total:6.1%}  {name}" for name, n in stages.most_common()]
+    lines += ["", "Propias:"]
+    lines += [f"  {n / total:6.1%}  {frame}" for frame, n in own.most_common(top)]
+    lines += ["", "Acumuladas:"]
+    lines += [f"  {n / total:6.1%}  {frame}" for frame, n in inclusive.most_common(top)]
+    return "\n".join(lines) + "\n"
+
+
+def _write_samples(directory, top):
+    _sampler.stop()
+    total = Counter()
+    for label, counter in sorted(_sampler.samples.items()):
+        _write_folded(os.path.join(directory, f"{_filename(label)}.folded"), counter)
+        total.update(counter)
+    _write_folded(os.path.join(directory, "all.folded"), total)
+    return _top_frames(total, top)
+
+
+def finish(top=30):
+    """
+    Detiene el perfilado y escribe los resultados en PROFILE_DIR: un archivo por sección,
+    el total (all.pstats / all.folded) y top.txt con las `top` funciones más pesadas.
+    Devuelve la ruta de top.txt, o None si el perfilado no estaba activo.
+    """
+    if MODE is None:
+        return None
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    summary = _write_cprofile(PROFILE_DIR, top) if MODE == 'cprofile' else _write_samples(PROFILE_DIR, top)
+    path = os.path.join(PROFILE_DIR, "top.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(summary)
+    return path
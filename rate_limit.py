@@ -0,0 +1,94 @@
+# rate_limit.py
+import threading
+import time
+from urllib.parse import urlparse
+
+import profiling
+
+# Política de cortesía por host (clave: host sin "www."):
+#   rate        -> peticiones por segundo sostenidas
+#   burst       -> peticiones que pueden salir seguidas antes de esperar
+#   crawl_delay -> separación mínima en segundos entre dos peticiones (opcional, tipo robots.txt)
+# Se llena con configure() a partir del campo 'rate' de cada sitio en sites.SITES.
+RATE_POLICIES = {}
+
+# Para hosts no declarados (CDNs, enlaces a otros dominios, etc.)
+DEFAULT_POLICY = {'rate': 1.0, 'burst': 2}
+
+
+class TokenBucket:
+    """
+    Cubeta de tokens segura entre hilos. Cada petición reserva su turno bajo el
+    candado y duerme fuera de él, así los hilos del mismo host se encolan en orden
+    sin bloquear a los de otros hosts.
+    """
+
+    def __init__(self, rate, burst=1, crawl_delay=None):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.crawl_delay = crawl_delay
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._last = None
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Reserva un turno y devuelve cuántos segundos hay que esperar para usarlo."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+
+            # Si la cubeta queda en negativo, el turno llega cuando se repongan esos tokens
+            at = now if self._tokens >= 0 else now - self._tokens / self.rate
+            if self.crawl_delay and self._last is not None:
+                at = max(at, self._last + self.crawl_delay)
+            self._last = at
+            return at - now
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            with profiling.stage("espera"):
+                time.sleep(wait)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def _host_key(url):
+    host = urlparse(url).netloc.lower().split(':')[0]
+    return host[4:] if host.startswith('www.') else host
+
+
+def configure(url, rate, burst=1, crawl_delay=None):
+    """Declara (o reemplaza) la política del host de `url`."""
+    key = _host_key(url)
+    with _buckets_lock:
+        RATE_POLICIES[key] = {'rate': rate, 'burst': burst, 'crawl_delay': crawl_delay}
+        _buckets.pop(key, None)
+
+
+def policy_for(url):
+    return RATE_POLICIES.get(_host_key(url), DEFAULT_POLICY)
+
+
+def get_bucket(url):
+    key = _host_key(url)
+    bucket = _buckets.get(key)
+    if bucket is None:
+        with _buckets_lock:
+            bucket = _buckets.get(key)
+            if bucket is None:
+                bucket = _buckets[key] = TokenBucket(**RATE_POLICIES.get(key, DEFAULT_POLICY))
+    return bucket
+
+
+def acquire(url):
+    """
+    Bloquea el hilo actual hasta que el host de `url` admita otra petición.
+    Peticiones a hosts distintos nunca esperan entre sí.
+    """
+    get_bucket(url).acquire()
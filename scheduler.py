@@ -0,0 +1,119 @@
+# scheduler.py
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+from utils import CACHE_DIR, write_atomic
+
+log = logging.getLogger(__name__)
+
+# Intervalo de cada sección en modo daemon (main.py --daemon). Cada una se visita de
+# nuevo según lo que publica: se estima cuántas URLs nuevas aparecen por segundo y
+# el intervalo es el tiempo en que se esperan TARGET_NEW nuevas, entre MIN y MAX.
+# Un sitio puede fijar sus propios límites con 'interval': {'min': s, 'max': s}.
+MIN_INTERVAL = 5 * 60
+MAX_INTERVAL = 4 * 3600
+INITIAL_INTERVAL = 15 * 60
+TARGET_NEW = 3
+
+# Peso de la última visita en la estimación (media móvil exponencial). Cada visita sin
+# nada nuevo multiplica el intervalo por ~1/(1 - ALPHA): las secciones quietas se
+# espacian solas y vuelven a acelerarse en cuanto publican.
+ALPHA = 0.3
+
+# Cada espera se estira o se acorta al azar hasta este porcentaje, para que las
+# secciones de un mismo host no terminen sincronizadas
+JITTER = 0.15
+
+# Las primeras visitas se reparten en este lapso en lugar de salir todas juntas
+STARTUP_SPREAD = 60
+
+# Lo aprendido se guarda entre reinicios del daemon
+STATE_PATH = os.path.join(CACHE_DIR, "schedule.json")
+
+
+class Schedule:
+    """
+    Estado del daemon por sección ("sitio/seccion"): intervalo actual, tasa estimada
+    de URLs nuevas, URLs y hora de la última visita. Seguro entre hilos.
+    """
+
+    def __init__(self, sites, path=STATE_PATH, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL):
+        self.path = path
+        self._lock = threading.Lock()
+        self._limits = {}
+        saved = self._load()
+        self._state = {}
+        for site, spec in sites.items():
+            bounds = spec.get('interval') or {}
+            low = bounds.get('min', min_interval)
+            high = max(low, bounds.get('max', max_interval))
+            for section in spec['sections']:
+                key = f"{site}/{section}"
+                self._limits[key] = (low, high)
+                entry = saved.get(key) or {}
+                self._state[key] = {
+                    'interval': self._clamp(key, entry.get('interval', INITIAL_INTERVAL)),
+                    'rate': entry.get('rate'),
+                    'last_run': entry.get('last_run'),
+                    'urls': entry.get('urls', []),
+                }
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        with self._lock:
+            data = json.dumps(self._state)
+        write_atomic(self.path, data)
+
+    def _clamp(self, key, seconds):
+        low, high = self._limits[key]
+        return min(max(seconds, low), high)
+
+    def first_delay(self, site, section):
+        """
+        Espera antes de la primera visita: lo que le falte al intervalo guardado desde
+        la última corrida (si el daemon se reinició), repartido al azar en STARTUP_SPREAD.
+        """
+        entry = self._state[f"{site}/{section}"]
+        remaining = 0
+        if entry['last_run']:
+            remaining = max(0, entry['last_run'] + entry['interval'] - time.time())
+        return remaining + random.uniform(0, STARTUP_SPREAD)
+
+    def record(self, site, section, urls):
+        """
+        Registra una visita que encontró `urls` y devuelve la espera hasta la siguiente
+        (con jitter). Una visita sin URLs (falló la portada, el scraper lanzó una
+        excepción...) no cuenta para la estimación: se conserva el intervalo.
+        """
+        key = f"{site}/{section}"
+        now = time.time()
+        with self._lock:
+            entry = self._state[key]
+            if urls:
+                new = len(set(urls) - set(entry['urls']))
+                # La primera visita no sirve para estimar: todo es "nuevo"
+                if entry['last_run'] and entry['urls']:
+                    observed = new / max(now - entry['last_run'], 1)
+                    rate = observed if entry['rate'] is None else ALPHA * observed + (1 - ALPHA) * entry['rate']
+                    entry['rate'] = rate
+                    entry['interval'] = self._clamp(key, TARGET_NEW / rate if rate > 0 else entry['interval'] / (1 - ALPHA))
+                    log.info("%s: %s URLs nuevas; próxima visita en ~%.0f min.", key, new, entry['interval'] / 60)
+                entry['urls'] = list(urls)
+                entry['last_run'] = now
+            interval = entry['interval']
+        return interval * random.uniform(1 - JITTER, 1 + JITTER)
+
+    def intervals(self):
+        """{"sitio/seccion": segundos} con el intervalo actual de cada sección."""
+        with self._lock:
+            return {key: entry['interval'] for key, entry in self._state.items()}
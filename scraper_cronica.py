@@ -1,85 +1,104 @@
 # scraper_cronica.py
-import requests
-from bs4 import BeautifulSoup
-from newspaper import Article
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
+import logging
+from functools import partial
+from parsing import make_soup, class_strainer
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-import time
-from utils import clean_article_text
+from utils import ordered_unique, ArticleSink
+import browser_pool
+import discovery
+import metrics
+import profiling
+import seen_store
+from fetch import extract_article
+from extraction import article_item
 
-def scrape_cronica(url):
+log = logging.getLogger(__name__)
+
+# Elemento que indica que la portada de la sección terminó de cargar; sites.SITES lo
+# declara como 'render' y browser_pool.render lo toma de ahí
+WAIT_FOR = (By.CLASS_NAME, "lc-top-table-list")
+
+# Contenedores de notas de la portada, de mayor a menor
+CONTAINERS = [
+    'extra-large-container-la-cronica',
+    'medium-container-la-cronica',
+    'small-container-la-cronica',
+]
+
+# Corre en un proceso de extract_pool: parseo, extracción y limpieza de cada nota
+_extract = partial(article_item, site='cronica')
+
+def _collect_links(url, html, encoding=None):
     """
-    Rastrea La Crónica usando Selenium para manejar la carga dinámica de la página
-    y evitar bloqueos.
+    Enlaces de notas en la portada de una sección de La Crónica, en el orden en que aparecen.
     """
-    # Usamos Selenium para abrir el navegador en modo "headless" (sin ventana visible)
-    service = Service(ChromeDriverManager().install())
-    options = webdriver.ChromeOptions()
-    options.add_argument('--headless')
-    driver = webdriver.Chrome(service=service, options=options)
-    
-    scraped_articles = []
+    soup = make_soup(html, class_strainer(*CONTAINERS), encoding)
 
-    try:
-        driver.get(url)
+    # Selectores específicos para La Crónica
+    article_links = []
 
-        # Esperamos a que el elemento que contiene las noticias se cargue
-        WebDriverWait(driver, 20).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "lc-top-table-list"))
-        )
-        
-        html = driver.page_source
-        soup = BeautifulSoup(html, 'html.parser')
+    for tag in soup.find_all(class_='extra-large-container-la-cronica'):
+        if tag.find('a', class_='extra-large-title'):
+            article_links.append(tag.find('a', class_='extra-large-title')['href'])
 
-        # Selectores específicos para La Crónica
-        article_links = []
-        
-        for tag in soup.find_all(class_='extra-large-container-la-cronica'):
-            if tag.find('a', class_='extra-large-title'):
-                article_links.append(tag.find('a', class_='extra-large-title')['href'])
+    for tag in soup.find_all(class_='medium-container-la-cronica'):
+        if tag.find('a', class_='medium-title'):
+            article_links.append(tag.find('a', class_='medium-title')['href'])
+
+    for tag in soup.find_all(class_='small-container-la-cronica'):
+        if tag.find('a', class_='small-title'):
+            article_links.append(tag.find('a', class_='small-title')['href'])
 
-        for tag in soup.find_all(class_='medium-container-la-cronica'):
-            if tag.find('a', class_='medium-title'):
-                article_links.append(tag.find('a', class_='medium-title')['href'])
+    return article_links
 
-        for tag in soup.find_all(class_='small-container-la-cronica'):
-            if tag.find('a', class_='small-title'):
-                article_links.append(tag.find('a', class_='small-title')['href'])
+def scrape_cronica(url, max_articles=None, on_article=None):
+    """
+    Rastrea La Crónica usando Selenium para manejar la carga dinámica de la página
+    y evitar bloqueos.
+    """
+    scraped_articles = ArticleSink(on_article)
+
+    try:
+        # Las notas del feed de la sección van primero; si no alcanzan se abre la portada
+        feed = discovery.section_entries(url)
+        article_links = list(feed)
+        if discovery.needs_listing(feed, max_articles):
+            # Selenium (Chrome headless compartido) espera a que se cargue el contenedor de noticias
+            try:
+                html = browser_pool.render(url)
+            except Exception as e:
+                # Sin portada igual se raspa lo que trajo el feed
+                if not article_links:
+                    raise
+                log.warning("No se pudo cargar la portada de La Crónica %s: %s", url, e)
+            else:
+                with profiling.stage("enlaces"):
+                    listing = _collect_links(url, html)
+                article_links = discovery.merge_links(article_links, listing, base_url=url)
         
-        print(f"Se encontraron {len(article_links)} enlaces en La Crónica.")
+        log.info("Se encontraron %s enlaces en La Crónica.", len(article_links))
+        metrics.inc("links_found_total", len(article_links))
+
+        for link in ordered_unique(article_links, base_url=url):
+            if max_articles and len(scraped_articles) >= max_articles:
+                break
 
-        for link in set(article_links):
             try:
-                if not link.startswith('http'):
-                    link = requests.compat.urljoin(url, link)
-                
-                article = Article(link)
-                article.download()
-                article.parse()
-                
-                # Limpieza centralizada
-                cleaned_text = clean_article_text(article.text)
-                clean_text = cleaned_text.split('\n') # Mantener compatibilidad si se usa como lista abajo, o ajustar uso.
-                # Revisando uso: "texto": "\n".join(clean_text) -> "texto": cleaned_text
-
-                scraped_articles.append({
-                    "url": link,
-                    "titulo": article.title,
-                    "texto": cleaned_text,
-                    "imagen_url": article.top_image
-                })
+                cached = seen_store.lookup(link)
+                if cached:
+                    scraped_articles.append(cached)
+                    continue
+
+                item = discovery.feed_item(feed.get(link), site='cronica') or extract_article(link, _extract)
+                seen_store.remember(item)
+                scraped_articles.append(item)
                 
-                print(f"Artículo de Cronica extraído: {article.title}")
-                time.sleep(3) # Pausa para evitar bloqueos
+                log.debug("Artículo de Cronica extraído: %s", item['titulo'])
                 
             except Exception as e:
-                print(f"Error al procesar el artículo de Cronica {link}: {e}")
+                log.warning("Error al procesar el artículo de Cronica %s: %s", link, e)
 
-    finally:
-        driver.quit()
+    except Exception as e:
+        log.warning("Error cargando la sección de La Crónica %s: %s", url, e)
     
     return scraped_articles
\ No newline at end of file
@@ -1,30 +1,30 @@
 # scraper_excelsior.py
+import logging
 import requests
-from bs4 import BeautifulSoup
-from newspaper import Article
-import time
-from utils import clean_article_text
+from parsing import make_soup, declared_encoding
+from utils import clean_article_text, is_from_current_year, ordered_unique, ArticleSink
+import discovery
+import metrics
+import profiling
+import seen_store
+from fetch import fetch_cached, extract_article
+from extraction import document, meta_content, select, select_one
 
-def scrape_excelsior(url):
-    """
-    Rastrea Excélsior usando BeautifulSoup para extraer artículos.
-    """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-    }
-
-    try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(f"Error al acceder a la URL de Excelsior: {e}")
-        return []
+log = logging.getLogger(__name__)
 
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
+def _section_slug(url):
     # Determinamos el slug de la sección de la URL para filtrar
     # Ejemplo: /global, /nacional, /funcion o /internacional
-    section_slug = url.split('.mx/')[-1].split('/')[0]
+    return url.split('.mx/')[-1].split('/')[0]
+
+def _collect_links(url, html, encoding=None):
+    """
+    Enlaces de notas de la portada de una sección de Excélsior, en el orden en que
+    aparecen y sin los de menús, cabecera o pie de página.
+    """
+    # Basta con los enlaces y los bloques de navegación que hay que descartar
+    soup = make_soup(html, ['a', 'nav', 'header', 'footer'], encoding)
+    section_slug = _section_slug(url)
     
     # Mapeo de slugs alternativos que usa Excelsior internamente
     slug_mappings = {
@@ -57,108 +57,148 @@ def scrape_excelsior(url):
             # Debug: ¿Por qué estamos saltando links que parecen notas?
             # print(f"DEBUG: Saltado {href} (CorrectSec: {is_correct_section}, PassedLen: {passed_length})")
             pass
-    
-    scraped_articles = []
-    # Eliminar duplicados manteniendo orden
-    seen_links = set()
-    unique_links = []
-    for l in article_links:
-        if l not in seen_links:
-            unique_links.append(l)
-            seen_links.add(l)
-
-    print(f"Se encontraron {len(unique_links)} enlaces únicos en la sección {section_slug} de Excelsior.")
-
-    for link in set(article_links):
+
+    return article_links
+
+def _select_image(doc, link):
+    """
+    Elige la imagen principal de una nota de Excélsior: primero la versión en alta
+    resolución del área multimedia, luego og:image y al final la primera imagen real.
+    `doc` es el árbol lxml que ya construyó newspaper (extraction.document).
+    """
+    if doc is None:
+        return None
+
+    # Mejora de extracción de imagen: Scoped search y alta resolución
+    imagen_url = None
+
+    # Identificamos el contenedor principal de la nota (c-detail)
+    # Y específicamente el área de multimedia (c-detail__media) para la foto principal
+    detail_container = select_one(doc, 'div.c-detail')
+    if detail_container is None:
+        detail_container = select_one(doc, 'article')
+    media_area = select_one(doc, 'div.c-detail__media')
+
+    # El search_area es donde buscaremos si no hay media_area específica
+    search_area = media_area if media_area is not None else (detail_container if detail_container is not None else doc)
+
+    # 1. Buscamos en tags <source> (responsive images) DENTRO del área multimedia
+    sources = select(search_area, 'source[srcset]')
+    for src in sources:
+        srcset = src.get('srcset')
+        if 'main_image_813_542' in srcset or src.get('width') == '813':
+            imagen_url = srcset
+            break
+
+    # 2. Si no, cualquier 'main_image' DENTRO del área multimedia
+    if not imagen_url:
+        for src in sources:
+            if 'main_image' in src.get('srcset'):
+                imagen_url = src.get('srcset')
+                break
+
+    # 3. Si no hay source específica en la nota, intentamos og:image (metadata oficial)
+    if not imagen_url:
+        imagen_url = meta_content(doc, 'og:image')
+
+    # 4. Fallback: primera imagen real de la nota (evitando logos y basura del sidebar)
+    generics = ['logo', 'header', 'default_social', 'og_thumbnail', 'placeholder', 'fallback']
+    is_generic = any(g in str(imagen_url).lower() for g in generics) if imagen_url else True
+
+    if is_generic or not imagen_url:
+        # Buscamos primero en el área multimedia, luego en el resto de la nota
+        for area in [media_area, detail_container]:
+            if area is None: continue
+            for img in area.iter('img'):
+                src = img.get('src') or img.get('data-src') or ''
+                if ('/uploads/' in src or '/files/' in src) and not any(g in src.lower() for g in generics):
+                    imagen_url = src
+                    break
+            if imagen_url: break
+
+    # Asegurar URL absoluta
+    if imagen_url and not imagen_url.startswith('http'):
+        imagen_url = requests.compat.urljoin(link, imagen_url)
+
+    return imagen_url
+
+def _extract(link, article):
+    """
+    Arma el artículo a partir de la nota ya parseada; corre en un proceso de extract_pool.
+    Devuelve None para las notas que no son del año en curso.
+    """
+    # Filtro específico para Excelsior: solo notas del año actual (2026+)
+    # para evitar traer contenido "Evergreen" del 2025 que sigue en su portada.
+    if not is_from_current_year(article.publish_date):
+        log.debug("Saltando nota antigua de Excelsior: %s (%s)", article.title, article.publish_date)
+        return None
+
+    # Limpieza centralizada
+    cleaned_text = clean_article_text(article.text, site='excelsior')
+
+    # Validación de título: Evitar que el autor sea el título
+    titulo = article.title
+    if titulo and titulo.startswith('Por: '):
+         # En Excelsior, el título real suele estar en meta og:title.
+         pass
+
+    # El árbol de la nota ya lo construyó newspaper: no se vuelve a parsear
+    imagen_url = _select_image(document(article), link)
+
+    log.debug("%s... (Año: %s)", titulo[:60], article.publish_date.year if article.publish_date else '?')
+
+    return {
+        "url": link,
+        "titulo": titulo,
+        "texto": cleaned_text,
+        "imagen_url": imagen_url
+    }
+
+def scrape_excelsior(url, max_articles=None, on_article=None):
+    """
+    Rastrea Excélsior usando BeautifulSoup para extraer artículos.
+    """
+    # Las notas del feed de la sección van primero; la portada completa lo que falte.
+    # El cuerpo sí se baja de la nota: el filtro por año y la imagen salen del HTML completo
+    article_links = list(discovery.section_entries(url))
+    if discovery.needs_listing(article_links, max_articles):
         try:
-            if not link.startswith('http'):
-                link = requests.compat.urljoin(url, link)
-            
-            article = Article(link)
-            article.download()
-            article.parse()
-            
-            # Crear soup específico para esta nota (CRUCIAL: No reutilizar el soup de la sección)
-            article_soup = BeautifulSoup(article.html, 'html.parser')
-            
-            # Limpieza centralizada
-            cleaned_text = clean_article_text(article.text)
-            
-            # Filtro específico para Excelsior: solo notas del año actual (2026+)
-            # para evitar traer contenido "Evergreen" del 2025 que sigue en su portada.
-            from utils import is_from_current_year
-            if not is_from_current_year(article.publish_date):
-                print(f"Saltando nota antigua de Excelsior: {article.title} ({article.publish_date})")
+            response = fetch_cached(url)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            log.warning("Error al acceder a la URL de Excelsior: %s", e)
+            if not article_links:
+                return []
+        else:
+            with profiling.stage("enlaces"):
+                listing = _collect_links(url, response.content, declared_encoding(response))
+            article_links = discovery.merge_links(article_links, listing, base_url=url)
+    section_slug = _section_slug(url)
+
+    scraped_articles = ArticleSink(on_article)
+    # Eliminar duplicados manteniendo orden (el orden de la portada es la prioridad)
+    unique_links = ordered_unique(article_links, base_url=url)
+
+    log.info("Se encontraron %s enlaces únicos en la sección %s de Excelsior.", len(unique_links), section_slug)
+    metrics.inc("links_found_total", len(unique_links))
+
+    for link in unique_links:
+        if max_articles and len(scraped_articles) >= max_articles:
+            break
+
+        try:
+            cached = seen_store.lookup(link)
+            if cached:
+                scraped_articles.append(cached)
                 continue
 
-            # Validación de título: Evitar que el autor sea el título
-            titulo = article.title
-            if titulo and titulo.startswith('Por: '):
-                 # En Excelsior, el título real suele estar en meta og:title.
-                 pass
-
-            # Mejora de extracción de imagen: Scoped search y alta resolución
-            imagen_url = None
-            
-            # Identificamos el contenedor principal de la nota (c-detail)
-            # Y específicamente el área de multimedia (c-detail__media) para la foto principal
-            detail_container = article_soup.find('div', class_='c-detail') or article_soup.find('article')
-            media_area = article_soup.find('div', class_='c-detail__media')
-            
-            # El search_area es donde buscaremos si no hay media_area específica
-            search_area = media_area if media_area else (detail_container if detail_container else article_soup)
-
-            # 1. Buscamos en tags <source> (responsive images) DENTRO del área multimedia
-            sources = search_area.find_all('source', attrs={'srcset': True})
-            for src in sources:
-                srcset = src['srcset']
-                if 'main_image_813_542' in srcset or src.get('width') == '813':
-                    imagen_url = srcset
-                    break
-            
-            # 2. Si no, cualquier 'main_image' DENTRO del área multimedia
-            if not imagen_url:
-                for src in sources:
-                    if 'main_image' in src['srcset']:
-                        imagen_url = src['srcset']
-                        break
-            
-            # 3. Si no hay source específica en la nota, intentamos og:image (metadata oficial)
-            if not imagen_url:
-                og_image = article_soup.find('meta', attrs={'property': 'og:image'})
-                if og_image and og_image.get('content'):
-                    imagen_url = og_image['content']
-            
-            # 4. Fallback: primera imagen real de la nota (evitando logos y basura del sidebar)
-            generics = ['logo', 'header', 'default_social', 'og_thumbnail', 'placeholder', 'fallback']
-            is_generic = any(g in str(imagen_url).lower() for g in generics) if imagen_url else True
-            
-            if is_generic or not imagen_url:
-                # Buscamos primero en el área multimedia, luego en el resto de la nota
-                for area in [media_area, detail_container]:
-                    if not area: continue
-                    for img in area.find_all('img'):
-                        src = img.get('src') or img.get('data-src') or ''
-                        if ('/uploads/' in src or '/files/' in src) and not any(g in src.lower() for g in generics):
-                            imagen_url = src
-                            break
-                    if imagen_url: break
-            
-            # Asegurar URL absoluta
-            if imagen_url and not imagen_url.startswith('http'):
-                imagen_url = requests.compat.urljoin(link, imagen_url)
-
-            scraped_articles.append({
-                "url": link,
-                "titulo": titulo,
-                "texto": cleaned_text,
-                "imagen_url": imagen_url
-            })
-            
-            print(f"   [Excelsior] {titulo[:60]}... (Año: {article.publish_date.year if article.publish_date else '?'})")
-            time.sleep(1)
-            
+            item = extract_article(link, _extract)
+            if item is None:
+                continue
+            seen_store.remember(item)
+            scraped_articles.append(item)
+
         except Exception as e:
-            print(f"   [Error Excelsior] {link}: {e}")
+            log.warning("Error al procesar el artículo de Excelsior %s: %s", link, e)
     
     return scraped_articles
\ No newline at end of file
@@ -1,61 +1,80 @@
-import requests
-import time
-from bs4 import BeautifulSoup
-from newspaper import Article
-from utils import clean_article_text
+import logging
+from functools import partial
+from parsing import make_soup, declared_encoding
+from utils import ordered_unique, ArticleSink
+import discovery
+import metrics
+import profiling
+import seen_store
+from fetch import fetch_cached, extract_article
+from extraction import article_item
 
-HEADERS = {"User-Agent": "Mozilla/5.0"}
+log = logging.getLogger(__name__)
 
-def scrape_jornada(url):
+# Corre en un proceso de extract_pool: parseo, extracción y limpieza de cada nota
+_extract = partial(article_item, site='jornada', min_length=150)
+
+def _collect_links(url, html, encoding=None):
     """
-    Scraper de La Jornada (HTML estático, no Selenium)
+    Enlaces de notas de la portada de una categoría de La Jornada, en orden de aparición.
     """
-    scraped_articles = []
+    soup = make_soup(html, "h3", encoding)
 
-    try:
-        response = requests.get(url, headers=HEADERS, timeout=20)
-        soup = BeautifulSoup(response.text, "html.parser")
+    article_links = []
 
-        article_links = []
+    # 🔥 SELECTOR REAL DE LA JORNADA
+    for h3 in soup.select("h3"):
+        a = h3.find("a", href=True)
+        if a:
+            href = a["href"]
+            if href.startswith("/"):
+                article_links.append("https://www.jornada.com.mx" + href)
+            elif href.startswith("http"):
+                article_links.append(href)
 
-        # 🔥 SELECTOR REAL DE LA JORNADA
-        for h3 in soup.select("h3"):
-            a = h3.find("a", href=True)
-            if a:
-                href = a["href"]
-                if href.startswith("/"):
-                    article_links.append("https://www.jornada.com.mx" + href)
-                elif href.startswith("http"):
-                    article_links.append(href)
+    return article_links
+
+def scrape_jornada(url, max_articles=None, on_article=None):
+    """
+    Scraper de La Jornada (HTML estático, no Selenium)
+    """
+    scraped_articles = ArticleSink(on_article)
 
-        article_links = list(set(article_links))
-        print(f"Se encontraron {len(article_links)} enlaces en La Jornada.")
+    try:
+        # Las notas del feed de la sección van primero; la portada completa lo que falte
+        feed = discovery.section_entries(url)
+        article_links = list(feed)
+        if discovery.needs_listing(feed, max_articles):
+            response = fetch_cached(url)
+            with profiling.stage("enlaces"):
+                listing = ordered_unique(_collect_links(url, response.content, declared_encoding(response)))
+            article_links = discovery.merge_links(article_links, listing)
+        log.info("Se encontraron %s enlaces en La Jornada.", len(article_links))
+        metrics.inc("links_found_total", len(article_links))
 
         for link in article_links:
-            try:
-                art = Article(link, language="es")
-                art.download()
-                art.parse()
+            if max_articles and len(scraped_articles) >= max_articles:
+                break
 
-                if not art.text or len(art.text) < 150:
+            try:
+                cached = seen_store.lookup(link)
+                if cached:
+                    scraped_articles.append(cached)
                     continue
 
-                cleaned_text = clean_article_text(art.text)
-
-                scraped_articles.append({
-                    "url": link,
-                    "titulo": art.title,
-                    "texto": cleaned_text,
-                    "imagen_url": art.top_image
-                })
+                item = (discovery.feed_item(feed.get(link), site='jornada', min_length=150)
+                        or extract_article(link, _extract, language="es"))
+                if item is None:
+                    continue
+                seen_store.remember(item)
+                scraped_articles.append(item)
 
-                print(f"Artículo de La Jornada extraído: {art.title}")
-                time.sleep(2)
+                log.debug("Artículo de La Jornada extraído: %s", item['titulo'])
 
             except Exception as e:
-                print(f"Error artículo Jornada {link}: {e}")
+                log.warning("Error artículo Jornada %s: %s", link, e)
 
     except Exception as e:
-        print(f"Error cargando categoría Jornada: {e}")
+        log.warning("Error cargando categoría Jornada: %s", e)
 
     return scraped_articles
@@ -1,24 +1,20 @@
 # scraper_marca.py
-import time
-from utils import clean_article_text
+import logging
+from utils import clean_article_text, ordered_unique, ArticleSink
+import metrics
+import profiling
+import seen_store
+import discovery
+from fetch import fetch_cached, extract_article
+from extraction import document, meta_content, node_text, select, select_one
 import re
+from typing import Callable
 import requests
-from urllib.parse import urlparse, urljoin
-from bs4 import BeautifulSoup
-from newspaper import Article
-
-UA = (
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-    "AppleWebKit/537.36 (KHTML, like Gecko) "
-    "Chrome/124.0.0.0 Safari/537.36"
-)
-
-def _get(url, **kwargs):
-    headers = kwargs.pop("headers", {})
-    headers.setdefault("User-Agent", UA)
-    headers.setdefault("Accept", "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8")
-    headers.setdefault("Accept-Language", "es-MX,es;q=0.9,en;q=0.8")
-    return requests.get(url, headers=headers, timeout=kwargs.pop("timeout", 25), **kwargs)
+from urllib.parse import urlparse
+from canonical import canonical_url
+from parsing import make_soup, declared_encoding
+
+log = logging.getLogger(__name__)
 
 def _is_article_url(href: str) -> bool:
     if not href or not href.startswith("http"):
@@ -37,135 +33,185 @@ def _is_article_url(href: str) -> bool:
     path = urlparse(href).path.lower()
     return ("/mx/" in path) or re.search(r"/\d{4}/\d{2}/\d{2}/", path) is not None
 
-def _collect_links(base_url: str, soup: BeautifulSoup) -> list[str]:
-    links = []
-
-    # Selectores útiles del layout de Marca (portadas y listados)
-    selectors = [
-        # enlaces dentro de artículos/tarjetas
-        "article a[href]",
-        ".ue-c-cover-content__link[href]",
-        ".ue-c-article__link[href]",
-        ".mod-portadilla a[href]",
-        ".ue-c-card__header a[href]",
-        ".ue-c-card__link[href]",
-        ".ue-c-article__header a[href]",
-        # fallback amplio
-        "a[href]"
-    ]
-
-    seen = set()
-    for sel in selectors:
-        for a in soup.select(sel):
-            href = a.get("href")
-            if not href:
-                continue
-            if not href.startswith("http"):
-                href = urljoin(base_url, href)
-            href = href.split("?")[0]  # limpia querystrings
-            if href in seen:
-                continue
-            if _is_article_url(href):
-                seen.add(href)
-                links.append(href)
-
-    return links
-
-def _fallback_parse_with_bs(url: str, html: str) -> tuple[str, list[str], str, str | None]:
+# Selectores útiles del layout de Marca (portadas y listados), de mayor a menor prioridad.
+# Cada uno es (dónde, valor):
+#   'within_tag'   -> <a> dentro de un ancestro con esa etiqueta ("article a[href]")
+#   'within_class' -> <a> dentro de un ancestro con esa clase (".mod-portadilla a[href]")
+#   'class'        -> el propio elemento con esa clase (".ue-c-card__link[href]")
+#   'any'          -> cualquier <a href> (fallback amplio)
+LINK_SELECTORS = [
+    # enlaces dentro de artículos/tarjetas
+    ("within_tag", "article"),
+    ("class", "ue-c-cover-content__link"),
+    ("class", "ue-c-article__link"),
+    ("within_class", "mod-portadilla"),
+    ("within_class", "ue-c-card__header"),
+    ("class", "ue-c-card__link"),
+    ("within_class", "ue-c-article__header"),
+    # fallback amplio
+    ("any", None),
+]
+
+def _link_rank(tag) -> int | None:
+    """Índice del primer selector de LINK_SELECTORS que cumple `tag`, o None."""
+    own = tag.get("class") or ()
+    is_anchor = tag.name == "a"
+    # Etiquetas y clases de los ancestros por separado: <div class="article"> no es un
+    # <article>, ni <mod-portadilla> es un .mod-portadilla
+    names, classes = set(), set()
+    if is_anchor:
+        for parent in tag.parents:
+            names.add(parent.name)
+            classes.update(parent.get("class") or ())
+    for rank, (where, value) in enumerate(LINK_SELECTORS):
+        if where == "class" and value in own:
+            return rank
+        if not is_anchor:
+            continue
+        if (where == "any"
+                or (where == "within_tag" and value in names)
+                or (where == "within_class" and value in classes)):
+            return rank
+    return None
+
+def _collect_links(base_url: str, html: str | bytes, encoding: str | None = None) -> list[str]:
+    """
+    Enlaces de notas de la portada, ordenados como si se recorriera cada selector de
+    LINK_SELECTORS por turno (primero todos los del primero, luego los del segundo...),
+    pero con una sola pasada: cada enlace se queda con su mejor (selector, posición).
     """
-    Fallback mínimo si newspaper falla: (titulo, autores, texto, imagen)
+    soup = make_soup(html, encoding=encoding)
+    best = {}
+
+    for pos, tag in enumerate(soup.find_all(href=True)):
+        href = tag.get("href")
+        if not href:
+            continue
+        href = canonical_url(href, base_url)  # sin querystrings, fragmentos ni AMP
+        if href in best and best[href][0] == 0:
+            continue
+        if href not in best and not _is_article_url(href):
+            continue
+        rank = _link_rank(tag)
+        if rank is None:
+            continue
+        if href not in best or (rank, pos) < best[href]:
+            best[href] = (rank, pos)
+
+    return sorted(best, key=best.get)
+
+def _fallback_parse(doc) -> tuple[str, list[str], str, str | None]:
+    """
+    Fallback mínimo si newspaper falla: (titulo, autores, texto, imagen).
+    Trabaja sobre el árbol que ya construyó newspaper (extraction.document).
     """
-    soup = BeautifulSoup(html, "html.parser")
     # Título
-    title = None
-    ogt = soup.find("meta", property="og:title")
-    if ogt and ogt.get("content"):
-        title = ogt["content"].strip()
-    if not title and soup.title:
-        title = soup.title.get_text(strip=True)
+    title = meta_content(doc, "og:title")
+    if not title:
+        tag = select_one(doc, "title")
+        title = node_text(tag) if tag is not None else None
 
     # Imagen
-    ogi = soup.find("meta", property="og:image")
-    image = ogi.get("content").strip() if ogi and ogi.get("content") else None
+    image = meta_content(doc, "og:image")
 
     # Autores (mejor esfuerzo)
     authors = []
     for meta_name in ("author", "article:author"):
-        m = soup.find("meta", attrs={"name": meta_name}) or soup.find("meta", property=meta_name)
-        if m and m.get("content"):
-            authors.append(m["content"].strip())
+        author = meta_content(doc, meta_name)
+        if author:
+            authors.append(author)
     authors = list(dict.fromkeys(a for a in authors if a))
 
     # Texto simple (párrafos dentro del contenido principal; mejor esfuerzo)
     # Muchos artículos usan bloques con 'ue-l-article__body' o similar.
     text = ""
-    body = soup.select_one(".ue-l-article__body, .ue-c-article__body, article")
-    if body:
-        ps = [p.get_text(" ", strip=True) for p in body.select("p") if p.get_text(strip=True)]
-        text = "\n".join(ps)
+    body = select_one(doc, ".ue-l-article__body, .ue-c-article__body, article")
+    if body is not None:
+        ps = [node_text(p) for p in select(body, "p")]
+        text = "\n".join(p for p in ps if p)
 
     return title or "", authors, text, image
 
-def scrape_marca(url: str) -> list[dict]:
+def _extract(link: str, art) -> dict:
+    """
+    Arma el artículo a partir de la nota ya parseada por newspaper, con el fallback
+    sobre el mismo árbol si newspaper devuelve poco. Corre en un proceso de extract_pool.
+    """
+    titulo = art.title or ""
+    texto = art.text or ""
+    imagen = art.top_image or None
+
+    # Fallback si newspaper devuelve poco
+    doc = document(art)
+    if (not titulo or len(texto) < 200) and doc is not None:
+        t2, a2, txt2, img2 = _fallback_parse(doc)
+        titulo = titulo or t2
+        if len(texto) < 200 and txt2:
+            texto = txt2
+        if not imagen and img2:
+            imagen = img2
+
+    # Limpieza centralizada
+    cleaned_text = clean_article_text(texto, site="marca")
+
+    return {
+        "url": link,
+        "titulo": titulo,
+        "texto": cleaned_text,
+        "imagen_url": imagen
+    }
+
+def scrape_marca(url: str, max_articles: int | None = None, on_article: Callable | None = None) -> list[dict]:
     """
     Recibe una URL de sección o portada de Marca (p. ej. https://www.marca.com/mx/)
     y devuelve una lista de artículos con: url, titulo, autores, texto, imagen_url.
+    Deja de descargar en cuanto reúne `max_articles` artículos.
     """
-    print(f"[Marca] Raspando sección: {url}")
-    try:
-        resp = _get(url)
-        resp.raise_for_status()
-    except requests.HTTPError as he:
-        code = he.response.status_code if he.response is not None else "?"
-        print(f"[Marca] HTTP {code} al cargar la portada/sección: {url}")
-        return []
-    except Exception as e:
-        print(f"[Marca] Error al cargar la portada/sección: {e}")
-        return []
-
-    soup = BeautifulSoup(resp.text, "html.parser")
-    links = _collect_links(url, soup)
+    log.debug("Raspando sección: %s", url)
+    # Las notas del feed de la sección van primero y la portada completa lo que falte; el
+    # cuerpo se sigue bajando de la nota para poder usar el fallback de _extract
+    links = list(discovery.section_entries(url))
+    if discovery.needs_listing(links, max_articles):
+        try:
+            resp = fetch_cached(url)
+            resp.raise_for_status()
+        except requests.HTTPError as he:
+            code = he.response.status_code if he.response is not None else "?"
+            log.warning("HTTP %s al cargar la portada/sección: %s", code, url)
+            if not links:
+                return []
+        except Exception as e:
+            log.warning("Error al cargar la portada/sección: %s", e)
+            if not links:
+                return []
+        else:
+            with profiling.stage("enlaces"):
+                links = discovery.merge_links(links, _collect_links(url, resp.content, declared_encoding(resp)))
 
     # Deduplicado manteniendo orden
-    seen = set()
-    article_links = [h for h in links if not (h in seen or seen.add(h))]
+    article_links = ordered_unique(links)
+
+    log.info("Se encontraron %s enlaces candidatos.", len(article_links))
 
-    print(f"[Marca] Se encontraron {len(article_links)} enlaces candidatos.")
+    metrics.inc("links_found_total", len(article_links))
 
-    items = []
+    items = ArticleSink(on_article)
     for link in article_links:
+        if max_articles and len(items) >= max_articles:
+            break
+
         try:
-            art = Article(link, language="es")
-            art.download()
-            art.parse()
-            titulo = art.title or ""
-            autores = art.authors or []
-            texto = art.text or ""
-            imagen = art.top_image or None
-
-            # Fallback si newspaper devuelve poco
-            if (not titulo or len(texto) < 200) and art.html:
-                t2, a2, txt2, img2 = _fallback_parse_with_bs(link, art.html)
-                titulo = titulo or t2
-                # if not autores and a2: # Removed
-                #     autores = a2
-                if len(texto) < 200 and txt2:
-                    texto = txt2
-                if not imagen and img2:
-                    imagen = img2
-
-            # Limpieza centralizada
-            cleaned_text = clean_article_text(texto)
-
-            items.append({
-                "url": link,
-                "titulo": titulo,
-                "texto": cleaned_text,
-                "imagen_url": imagen
-            })
-            print(f"[Marca] OK: {titulo[:70]}{'...' if len(titulo) > 70 else ''}")
-            time.sleep(0.35)  # throttle suave
+            cached = seen_store.lookup(link)
+            if cached:
+                items.append(cached)
+                continue
+
+            item = extract_article(link, _extract, language="es")
+            seen_store.remember(item)
+            items.append(item)
+            titulo = item["titulo"]
+            log.debug("OK: %s%s", titulo[:70], '...' if len(titulo) > 70 else '')
         except Exception as e:
-            print(f"[Marca] Aviso: fallo al procesar {link} ({e})")
+            log.warning("Aviso: fallo al procesar %s (%s)", link, e)
 
     return items
@@ -1,11 +1,33 @@
 # scraper_noventagrados.py
+import logging
+from functools import partial
 import requests
-from bs4 import BeautifulSoup
-from newspaper import Article
-import time
-from utils import clean_article_text
+from parsing import make_soup, class_strainer, declared_encoding
+from utils import ordered_unique, ArticleSink
+import discovery
+import metrics
+import profiling
+import seen_store
+from fetch import fetch_cached, extract_article
+from extraction import article_item
 
-def scrape_noventagrados(url):
+log = logging.getLogger(__name__)
+
+# Corre en un proceso de extract_pool: parseo, extracción y limpieza de cada nota
+_extract = partial(article_item, site='noventagrados')
+
+def _collect_links(url, html, encoding=None):
+    """
+    Enlaces de notas de la portada de una sección de Noventa Grados, en orden de aparición.
+    """
+    soup = make_soup(html, class_strainer('nota_con_imagen', name='div'), encoding)
+
+    article_containers = soup.find_all('div', class_='nota_con_imagen')
+    article_links = [container.find('a', class_='nota_con_imagen_link')['href'] for container in article_containers if container.find('a', class_='nota_con_imagen_link')]
+
+    return article_links
+
+def scrape_noventagrados(url, max_articles=None, on_article=None):
     """
     Rastrea Noventa Grados usando BeautifulSoup para extraer artículos.
     """
@@ -13,48 +35,43 @@ def scrape_noventagrados(url):
     # ...
     # ...
    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
-    }
-
-    try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(f"Error al acceder a la URL de Noventa Grados: {e}")
-        return []
-
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
-    article_containers = soup.find_all('div', class_='nota_con_imagen')
-    article_links = [container.find('a', class_='nota_con_imagen_link')['href'] for container in article_containers if container.find('a', class_='nota_con_imagen_link')]
-    
-    scraped_articles = []
-    print(f"Se encontraron {len(article_links)} enlaces en Noventa Grados.")
+    # Las notas del feed de la sección van primero; la portada completa lo que falte
+    feed = discovery.section_entries(url)
+    article_links = list(feed)
+    if discovery.needs_listing(feed, max_articles):
+        try:
+            response = fetch_cached(url)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            log.warning("Error al acceder a la URL de Noventa Grados: %s", e)
+            if not article_links:
+                return []
+        else:
+            with profiling.stage("enlaces"):
+                listing = _collect_links(url, response.content, declared_encoding(response))
+            article_links = discovery.merge_links(article_links, listing, base_url=url)
+
+    scraped_articles = ArticleSink(on_article)
+    log.info("Se encontraron %s enlaces en Noventa Grados.", len(article_links))
+    metrics.inc("links_found_total", len(article_links))
+
+    for link in ordered_unique(article_links, base_url=url):
+        if max_articles and len(scraped_articles) >= max_articles:
+            break
 
-    for link in set(article_links):
         try:
-            if not link.startswith('http'):
-                link = requests.compat.urljoin(url, link)
-            
-            article = Article(link)
-            article.download()
-            article.parse()
-            
-            # Limpieza centralizada
-            cleaned_text = clean_article_text(article.text)
-
-            scraped_articles.append({
-                "url": link,
-                "titulo": article.title,
-                "texto": cleaned_text,
-                "imagen_url": article.top_image
-            })
+            cached = seen_store.lookup(link)
+            if cached:
+                scraped_articles.append(cached)
+                continue
+
+            item = discovery.feed_item(feed.get(link), site='noventagrados') or extract_article(link, _extract)
+            seen_store.remember(item)
+            scraped_articles.append(item)
             
-            print(f"Artículo de Noventa Grados extraído: {article.title}")
-            time.sleep(1)
+            log.debug("Artículo de Noventa Grados extraído: %s", item['titulo'])
             
         except Exception as e:
-            print(f"Error al procesar el artículo de Noventa Grados {link}: {e}")
+            log.warning("Error al procesar el artículo de Noventa Grados %s: %s", link, e)
     
     return scraped_articles
\ No newline at end of file
@@ -1,27 +1,26 @@
-import requests
-from bs4 import BeautifulSoup
-from newspaper import Article
-import time
-from utils import clean_article_text
+import logging
+from functools import partial
+from bs4 import SoupStrainer
+from parsing import make_soup, declared_encoding
+from utils import ordered_unique, ArticleSink
+import discovery
+import metrics
+import profiling
+import seen_store
+from fetch import fetch_cached, extract_article
+from extraction import article_item
 
-def scrape_sdp(url):
-    """
-    Scraper de SDP Noticias (espectáculos)
-    """
-    scraped_articles = []
+log = logging.getLogger(__name__)
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
-    }
+# Corre en un proceso de extract_pool: parseo, extracción y limpieza de cada nota
+_extract = partial(article_item, site='sdp', min_length=150)
 
-    try:
-        response = requests.get(url, headers=headers, timeout=20)
-        response.raise_for_status()
-    except Exception as e:
-        print(f"Error accediendo a SDP: {e}")
-        return []
-
-    soup = BeautifulSoup(response.text, "html.parser")
+def _collect_links(url, html, encoding=None):
+    """
+    Enlaces de notas de la portada de SDP Noticias, en orden de aparición.
+    """
+    # Solo interesan los <a>: el resto del documento ni se construye
+    soup = make_soup(html, SoupStrainer("a", href=True), encoding)
 
     article_links = []
 
@@ -33,31 +32,52 @@ def scrape_sdp(url):
                 href = "https://www.sdpnoticias.com" + href
             article_links.append(href)
 
-    article_links = list(set(article_links))
-    print(f"Se encontraron {len(article_links)} enlaces en SDP Noticias.")
+    return article_links
 
-    for link in article_links:
+def scrape_sdp(url, max_articles=None, on_article=None):
+    """
+    Scraper de SDP Noticias (espectáculos)
+    """
+    scraped_articles = ArticleSink(on_article)
+
+    # Las notas del feed de la sección van primero; la portada completa lo que falte
+    feed = discovery.section_entries(url)
+    article_links = list(feed)
+    if discovery.needs_listing(feed, max_articles):
         try:
-            article = Article(link, language="es")
-            article.download()
-            article.parse()
+            response = fetch_cached(url)
+            response.raise_for_status()
+        except Exception as e:
+            log.warning("Error accediendo a SDP: %s", e)
+            if not article_links:
+                return []
+        else:
+            with profiling.stage("enlaces"):
+                listing = ordered_unique(_collect_links(url, response.content, declared_encoding(response)))
+            article_links = discovery.merge_links(article_links, listing)
+    log.info("Se encontraron %s enlaces en SDP Noticias.", len(article_links))
+    metrics.inc("links_found_total", len(article_links))
 
-            if not article.text or len(article.text) < 150:
-                continue
+    for link in article_links:
+        if max_articles and len(scraped_articles) >= max_articles:
+            break
 
-            cleaned_text = clean_article_text(article.text)
+        try:
+            cached = seen_store.lookup(link)
+            if cached:
+                scraped_articles.append(cached)
+                continue
 
-            scraped_articles.append({
-                "url": link,
-                "titulo": article.title,
-                "texto": cleaned_text,
-                "imagen_url": article.top_image
-            })
+            item = (discovery.feed_item(feed.get(link), site='sdp', min_length=150)
+                    or extract_article(link, _extract, language="es"))
+            if item is None:
+                continue
+            seen_store.remember(item)
+            scraped_articles.append(item)
 
-            print(f"Artículo SDP extraído: {article.title}")
-            time.sleep(1)
+            log.debug("Artículo SDP extraído: %s", item['titulo'])
 
         except Exception as e:
-            print(f"Error SDP {link}: {e}")
+            log.warning("Error SDP %s: %s", link, e)
 
     return scraped_articles
@@ -1,79 +1,96 @@
-import time
-from bs4 import BeautifulSoup
-from newspaper import Article
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
+import logging
+from functools import partial
+from parsing import make_soup
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from utils import clean_article_text
+from utils import ordered_unique, ArticleSink
+import browser_pool
+import discovery
+import metrics
+import profiling
+import seen_store
+from fetch import extract_article
+from extraction import article_item
 
+log = logging.getLogger(__name__)
 
-def scrape_universal(url):
-    """
-    Scraper de El Universal usando Selenium (JS heavy site)
-    """
-    scraped_articles = []
+# Las notas se pintan con JS: esperamos a que exista al menos un <article>. sites.SITES
+# lo declara como 'render' y browser_pool.render lo toma de ahí
+WAIT_FOR = (By.TAG_NAME, "article")
 
-    service = Service(ChromeDriverManager().install())
-    options = webdriver.ChromeOptions()
-    options.add_argument("--headless")
-    options.add_argument("--disable-blink-features=AutomationControlled")
+# Corre en un proceso de extract_pool: parseo, extracción y limpieza de cada nota
+_extract = partial(article_item, site='universal', min_length=200)
 
-    driver = webdriver.Chrome(service=service, options=options)
 
-    try:
-        driver.get(url)
+def _collect_links(url, html, encoding=None):
+    """
+    Enlaces de notas de la portada de una sección de El Universal, en orden de aparición.
+    """
+    soup = make_soup(html, "article", encoding)
 
-        # Esperar a que carguen notas
-        WebDriverWait(driver, 20).until(
-            EC.presence_of_element_located((By.TAG_NAME, "article"))
-        )
+    article_links = []
 
-        html = driver.page_source
-        soup = BeautifulSoup(html, "html.parser")
+    # El Universal usa <article> con <a>
+    for art in soup.find_all("article"):
+        a = art.find("a", href=True)
+        if a:
+            href = a["href"]
+            if href.startswith("/"):
+                article_links.append("https://www.eluniversal.com.mx" + href)
+            elif href.startswith("http"):
+                article_links.append(href)
 
-        article_links = []
+    return article_links
 
-        # El Universal usa <article> con <a>
-        for art in soup.find_all("article"):
-            a = art.find("a", href=True)
-            if a:
-                href = a["href"]
-                if href.startswith("/"):
-                    article_links.append("https://www.eluniversal.com.mx" + href)
-                elif href.startswith("http"):
-                    article_links.append(href)
 
-        article_links = list(set(article_links))
-        print(f"Se encontraron {len(article_links)} enlaces en El Universal.")
+def scrape_universal(url, max_articles=None, on_article=None):
+    """
+    Scraper de El Universal usando Selenium (JS heavy site)
+    """
+    scraped_articles = ArticleSink(on_article)
 
-        for link in article_links:
+    try:
+        # Las notas del feed de la sección van primero; si no alcanzan se abre la portada
+        feed = discovery.section_entries(url)
+        article_links = list(feed)
+        if discovery.needs_listing(feed, max_articles):
+            # Esperar a que carguen notas (Chrome headless compartido)
             try:
-                article = Article(link, language="es")
-                article.download()
-                article.parse()
+                html = browser_pool.render(url)
+            except Exception as e:
+                # Sin portada igual se raspa lo que trajo el feed
+                if not article_links:
+                    raise
+                log.warning("No se pudo cargar la portada de El Universal %s: %s", url, e)
+            else:
+                with profiling.stage("enlaces"):
+                    listing = ordered_unique(_collect_links(url, html))
+                article_links = discovery.merge_links(article_links, listing)
+        log.info("Se encontraron %s enlaces en El Universal.", len(article_links))
+        metrics.inc("links_found_total", len(article_links))
 
-                if not article.text or len(article.text) < 200:
-                    continue
+        for link in article_links:
+            if max_articles and len(scraped_articles) >= max_articles:
+                break
 
-                cleaned_text = clean_article_text(article.text)
+            try:
+                cached = seen_store.lookup(link)
+                if cached:
+                    scraped_articles.append(cached)
+                    continue
 
-                scraped_articles.append({
-                    "url": link,
-                    "titulo": article.title,
-                    "texto": cleaned_text,
-                    "imagen_url": article.top_image
-                })
+                item = (discovery.feed_item(feed.get(link), site='universal', min_length=200)
+                        or extract_article(link, _extract, language="es"))
+                if item is None:
+                    continue
+                seen_store.remember(item)
+                scraped_articles.append(item)
 
-                print(f"Artículo de El Universal extraído: {article.title}")
-                time.sleep(3)
+                log.debug("Artículo de El Universal extraído: %s", item['titulo'])
 
             except Exception as e:
-                print(f"Error artículo El Universal {link}: {e}")
+                log.warning("Error artículo El Universal %s: %s", link, e)
 
-    finally:
-        driver.quit()
+    except Exception as e:
+        log.warning("Error cargando la sección de El Universal %s: %s", url, e)
 
     return scraped_articles
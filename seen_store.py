@@ -0,0 +1,95 @@
+# seen_store.py
+import hashlib
+import os
+import threading
+import time
+
+from canonical import canonical_url
+import metrics
+from utils import CACHE_DIR, open_sqlite
+
+DB_PATH = os.path.join(CACHE_DIR, "seen_articles.sqlite3")
+
+# Antigüedad máxima (segundos) para reutilizar un artículo ya visto.
+# None = nunca se vuelve a descargar un artículo conocido.
+MAX_AGE = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    url TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    content_hash TEXT NOT NULL,
+    titulo TEXT,
+    texto TEXT,
+    imagen_url TEXT
+);
+"""
+
+_conn = None
+_lock = threading.Lock()
+
+
+def _connect():
+    global _conn
+    if _conn is None:
+        # Una conexión compartida entre los hilos del crawler, protegida por _lock
+        _conn = open_sqlite(DB_PATH, _SCHEMA)
+    return _conn
+
+
+def _key(url):
+    """Clave del índice: la URL canónica (sin query, fragmento ni variante AMP)."""
+    return canonical_url(url)
+
+
+def _content_hash(item):
+    h = hashlib.sha256()
+    for field in ("titulo", "texto", "imagen_url"):
+        h.update((item.get(field) or "").encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def set_max_age(seconds):
+    """Configura a partir de qué antigüedad un artículo conocido se vuelve a descargar."""
+    global MAX_AGE
+    MAX_AGE = seconds
+
+
+def lookup(url):
+    """
+    Devuelve el artículo guardado para `url` (mismo formato que los scrapers) o None
+    si no se conoce o si es más viejo que MAX_AGE.
+    """
+    if not url:
+        return None
+    with _lock:
+        row = _connect().execute(
+            "SELECT url, fetched_at, titulo, texto, imagen_url FROM articles WHERE url = ?",
+            (_key(url),),
+        ).fetchone()
+    if row is None:
+        return None
+    if MAX_AGE is not None and time.time() - row[1] > MAX_AGE:
+        return None
+    metrics.inc("articles_reused_total")
+    return {"url": url, "titulo": row[2], "texto": row[3], "imagen_url": row[4]}
+
+
+def remember(item):
+    """
+    Guarda (o refresca) un artículo recién extraído. Los artículos sin texto no se
+    guardan, para que la siguiente corrida lo vuelva a intentar.
+    """
+    url = item.get("url")
+    if not url or not item.get("texto"):
+        return
+    with _lock:
+        conn = _connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO articles (url, fetched_at, content_hash, titulo, texto, imagen_url) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (_key(url), time.time(), _content_hash(item),
+             item.get("titulo"), item.get("texto"), item.get("imagen_url")),
+        )
+        conn.commit()
@@ -0,0 +1,202 @@
+# sites.py
+from scraper_cronica import scrape_cronica, WAIT_FOR as CRONICA_WAIT_FOR
+from scraper_noventagrados import scrape_noventagrados
+from scraper_netnoticias import scrape_netnoticias
+from scraper_excelsior import scrape_excelsior
+from scraper_forbes import scrape_forbes
+from scraper_marca import scrape_marca
+from scraper_unanimo import scrape_unanimo
+from scraper_universal import scrape_universal, WAIT_FOR as UNIVERSAL_WAIT_FOR
+from scraper_jornada import scrape_jornada
+from scraper_sdp import scrape_sdp
+from scraper_infobae import scrape_infobae
+
+# Registro de periódicos. Cada sitio declara:
+#   scraper      -> función que recibe la URL de la sección y devuelve la lista de artículos
+#   sections     -> {nombre de la sección: URL}; el resultado se guarda en <sitio>/<seccion>.xml
+#   max_articles -> máximo de artículos por sección (None = todos)
+#   rate         -> política de cortesía del host (ver rate_limit.TokenBucket)
+#   concurrency  -> secciones del sitio que pueden rasparse a la vez
+#   render       -> localizador de Selenium a esperar si la portada necesita navegador, o None
+#   timeout      -> segundos por petición HTTP / espera del navegador
+#   feeds        -> opcional, {sección: URL o {'url', 'match', 'trial'}} de un RSS/Atom o
+#                   sitemap de noticias que lista las notas; si trae al menos max_articles no
+#                   se lee la portada ni se abre el navegador (si no, la portada completa lo
+#                   que falte), y si trae content:encoded tampoco se descarga la nota (ver
+#                   discovery.py). 'match' filtra las URLs de un feed de todo el sitio;
+#                   'trial' marca URLs sin verificar, que solo se usan con --trial-feeds.
+#   interval     -> opcional, {'min': s, 'max': s}: límites propios del intervalo entre
+#                   visitas en modo daemon (por defecto los de scheduler.py)
+# Para sumar un periódico basta con agregar su entrada aquí.
+# Un solo sitemap de noticias para todo El Universal; cada sección se queda con sus URLs.
+# Los feeds de Arc (El Universal, SDP, Infobae) siguen el formato estándar de la
+# plataforma pero no se pudieron verificar: van como 'trial' hasta comprobarlos.
+UNIVERSAL_NEWS_SITEMAP = "https://www.eluniversal.com.mx/arc/outboundfeeds/sitemap-news/?outputType=xml"
+
+SITES = {
+
+    'excelsior': {
+        'scraper': scrape_excelsior,
+        'sections': {
+            'mundo': "https://www.excelsior.com.mx/global",
+            'nacional': "https://www.excelsior.com.mx/nacional",
+            'espectaculos': "https://www.excelsior.com.mx/funcion"
+        },
+        'max_articles': None,
+        'rate': {'rate': 1.0, 'burst': 2},
+        'concurrency': 2,
+        'render': None,
+        'timeout': 25,
+    },
+
+    'cronica': {
+        'scraper': scrape_cronica,
+        'sections': {
+            'mundo': "https://www.cronica.com.mx/mundo/",
+            'nacional': "https://www.cronica.com.mx/nacional/",
+            'espectaculos': "https://www.cronica.com.mx/escenario/"
+        },
+        'max_articles': None,
+        'rate': {'rate': 1 / 3, 'burst': 1},
+        'concurrency': 1,
+        'render': CRONICA_WAIT_FOR,
+        'timeout': 20,
+    },
+
+    'noventagrados': {
+        'scraper': scrape_noventagrados,
+        'sections': {
+            'mundo': "https://www.noventagrados.com.mx/internacional.html",
+            'nacional': "https://www.noventagrados.com.mx/nacional.html",
+            'espectaculos': "https://www.noventagrados.com.mx/espectaculos.html"
+        },
+        'max_articles': None,
+        'rate': {'rate': 1.0, 'burst': 2},
+        'concurrency': 2,
+        'render': None,
+        'timeout': 25,
+    },
+
+    'netnoticias': {
+        'scraper': scrape_netnoticias,
+        'sections': {
+            'mundo': "https://netnoticias.mx/internacional",
+            'nacional': "https://netnoticias.mx/nacional",
+            'espectaculos': "https://netnoticias.mx/espectaculos"
+        },
+        'max_articles': None,
+        'rate': {'rate': 1.0, 'burst': 2},
+        'concurrency': 2,
+        'render': None,
+        'timeout': 25,
+    },
+
+    'forbes': {
+        'scraper': scrape_forbes,
+        'sections': {
+            'mundo': "https://forbes.com.mx/internacional/",
+            'nacional': "https://forbes.com.mx/forbes-politica/",
+            'espectaculos': "https://forbes.com.mx/forbes-life/all-access/"
+        },
+        'max_articles': None,
+        'rate': {'rate': 3.0, 'burst': 3},
+        'concurrency': 2,
+        'render': None,
+        'timeout': 25,
+    },
+
+    'marca': {
+        'scraper': scrape_marca,
+        'sections': {
+            'futbol': "https://www.marca.com/mx/futbol.html?intcmp=MENUPROD&s_kw=mx-futbol"
+        },
+        'max_articles': 10,
+        'rate': {'rate': 3.0, 'burst': 3},
+        'concurrency': 2,
+        'render': None,
+        'timeout': 25,
+    },
+
+    'unanimo': {
+        'scraper': scrape_unanimo,
+        'sections': {
+            'futbol': "https://unanimodeportes.com/deportes/futbol/"
+        },
+        'feeds': {
+            'futbol': "https://unanimodeportes.com/deportes/futbol/feed/"
+        },
+        'max_articles': 10,
+        'rate': {'rate': 3.0, 'burst': 3},
+        'concurrency': 2,
+        'render': None,
+        'timeout': 25,
+    },
+
+    'universal': {
+        'scraper': scrape_universal,
+        'sections': {
+            'mundo': "https://www.eluniversal.com.mx/mundo/",
+            'nacional': "https://www.eluniversal.com.mx/nacion/",
+            'espectaculos': "https://www.eluniversal.com.mx/espectaculos/"
+        },
+        'feeds': {
+            'mundo': {'url': UNIVERSAL_NEWS_SITEMAP, 'match': '/mundo/', 'trial': True},
+            'nacional': {'url': UNIVERSAL_NEWS_SITEMAP, 'match': '/nacion/', 'trial': True},
+            'espectaculos': {'url': UNIVERSAL_NEWS_SITEMAP, 'match': '/espectaculos/', 'trial': True}
+        },
+        'max_articles': None,
+        'rate': {'rate': 1 / 3, 'burst': 1},
+        'concurrency': 1,
+        'render': UNIVERSAL_WAIT_FOR,
+        'timeout': 20,
+    },
+
+    'jornada': {
+        'scraper': scrape_jornada,
+        'sections': {
+            'espectaculos': "https://www.jornada.com.mx/categoria/espectaculos",
+            'mundo': "https://www.jornada.com.mx/categoria/mundo",
+            'capital': "https://www.jornada.com.mx/categoria/capital"
+        },
+        'max_articles': None,
+        'rate': {'rate': 0.5, 'burst': 1},
+        'concurrency': 2,
+        'render': None,
+        'timeout': 20,
+    },
+
+    'sdp': {
+        'scraper': scrape_sdp,
+        'sections': {
+            'espectaculos': "https://www.sdpnoticias.com/espectaculos/"
+        },
+        'feeds': {
+            'espectaculos': {'url': "https://www.sdpnoticias.com/arc/outboundfeeds/rss/?outputType=xml",
+                             'match': '/espectaculos/', 'trial': True}
+        },
+        'max_articles': 20,
+        'rate': {'rate': 1.0, 'burst': 2},
+        'concurrency': 2,
+        'render': None,
+        'timeout': 20,
+    },
+
+    'infobae': {
+        'scraper': scrape_infobae,
+        'sections': {
+            'espectaculos': "https://www.infobae.com/teleshow/"
+        },
+        'feeds': {
+            'espectaculos': {'url': "https://www.infobae.com/arc/outboundfeeds/rss/?outputType=xml",
+                             'match': '/teleshow/', 'trial': True}
+        },
+        'max_articles': 25,
+        'rate': {'rate': 1.0, 'burst': 2},
+        'concurrency': 2,
+        'render': None,
+        'timeout': 20,
+    },
+}
+
+# Vista compatible con el diccionario SECTIONS original: {sitio: {seccion: url}}
+SECTIONS = {site: spec['sections'] for site, spec in SITES.items()}
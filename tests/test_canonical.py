@@ -0,0 +1,54 @@
+import pytest
+
+from canonical import canonical_url
+
+BASE = "https://www.marca.com/mx/futbol.html"
+
+
+@pytest.mark.parametrize("url, expected", [
+    # Parámetros de rastreo y fragmentos
+    ("https://www.marca.com/mx/nota.html?intcmp=MENUPROD&s_kw=mx", "https://www.marca.com/mx/nota.html"),
+    ("https://www.marca.com/mx/nota.html#comentarios", "https://www.marca.com/mx/nota.html"),
+    # Host en minúsculas, sin punto final ni puerto por defecto
+    ("HTTPS://WWW.Marca.COM./mx/nota.html", "https://www.marca.com/mx/nota.html"),
+    ("https://www.marca.com:443/mx/nota.html", "https://www.marca.com/mx/nota.html"),
+    ("http://www.marca.com:80/mx/nota.html", "http://www.marca.com/mx/nota.html"),
+    ("https://www.marca.com:8443/mx/nota.html", "https://www.marca.com:8443/mx/nota.html"),
+    # Variantes AMP
+    ("https://www.infobae.com/amp/teleshow/2026/01/02/nota/", "https://www.infobae.com/teleshow/2026/01/02/nota/"),
+    ("https://forbes.com.mx/nota/amp/", "https://forbes.com.mx/nota/"),
+    ("https://forbes.com.mx/nota/amp", "https://forbes.com.mx/nota/"),
+    ("https://www.marca.com/mx/nota.amp.html", "https://www.marca.com/mx/nota.html"),
+    ("https://www.marca.com/mx/nota.amp", "https://www.marca.com/mx/nota"),
+    ("https://amp.eluniversal.com.mx/mundo/nota", "https://eluniversal.com.mx/mundo/nota"),
+    # Sin ruta
+    ("https://www.marca.com", "https://www.marca.com/"),
+])
+def test_forma_canonica(url, expected):
+    assert canonical_url(url) == expected
+
+
+@pytest.mark.parametrize("url", [
+    "https://www.marca.com/mx/ampliacion-del-estadio.html",
+    "https://www.marca.com/mx/amp-nota/",
+    "https://www.marca.com/mx/example.amplio.html",
+])
+def test_amp_dentro_del_nombre_no_se_toca(url):
+    assert canonical_url(url) == url
+
+
+def test_relativas_contra_base():
+    assert canonical_url("/mx/nota.html?utm_source=x", BASE) == "https://www.marca.com/mx/nota.html"
+    assert canonical_url("nota.html", BASE) == "https://www.marca.com/mx/nota.html"
+    assert canonical_url("  https://www.marca.com/mx/nota.html  ", BASE) == "https://www.marca.com/mx/nota.html"
+
+
+def test_mismo_resultado_dos_veces():
+    url = canonical_url("https://AMP.Marca.com:443/amp/mx/nota.amp.html?x=1#y")
+    assert url == "https://marca.com/mx/nota.html"
+    assert canonical_url(url) == url
+
+
+def test_vacias():
+    assert canonical_url("") == ""
+    assert canonical_url(None) is None
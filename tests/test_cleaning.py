@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+import cleaning
+
+TEXTO = "\n".join([
+    "México y Francia firman un acuerdo comercial.",
+    "Compartir en Facebook",
+    "x",
+    "El texto sigue con más detalles.",
+    "  Síguenos en nuestras redes  ",
+    "Con información de Reuters",
+    "(@Europarl_ES/x)",
+    "",
+    "Sigue el minuto a minuto del partido.",
+    "Este artículo fue publicado originalmente por Forbes US.",
+    "Cierre de la nota.",
+])
+
+
+def _cleaners(monkeypatch, rule_sets):
+    """El mismo juego de reglas con el autómata Aho-Corasick y con el str.find de respaldo."""
+    pytest.importorskip("ahocorasick")
+    automaton = cleaning.Cleaner(rule_sets)
+    monkeypatch.setattr(cleaning, "ahocorasick", None)
+    fallback = cleaning.Cleaner(rule_sets)
+    assert automaton._automaton is not None and fallback._automaton is None
+    return automaton, fallback
+
+
+def test_automata_y_find_limpian_igual(monkeypatch):
+    rule_sets = [cleaning.GLOBAL_RULES, *cleaning.SITE_RULES.values()]
+    automaton, fallback = _cleaners(monkeypatch, rule_sets)
+
+    rng = random.Random(7)
+    pool = TEXTO.split("\n") + ["Otra línea de la nota.", "X", "facebook twitter", "horario: 20 h"]
+    for _ in range(500):
+        text = "\n".join(rng.choice(pool) for _ in range(rng.randint(0, 15)))
+        assert automaton.clean(text) == fallback.clean(text)
+
+
+def test_x_solo_descarta_la_linea_exacta():
+    cleaned = cleaning.clean_article_text(TEXTO, site="forbes")
+    assert "México y Francia firman un acuerdo comercial." in cleaned
+    assert "El texto sigue con más detalles." in cleaned
+    assert "x" not in cleaned.split("\n")
+
+
+def test_frases_de_forbes_y_reuters_separadas():
+    phrases = cleaning.GLOBAL_RULES["phrases"] + cleaning.SITE_RULES["forbes"]["phrases"]
+    assert "con información de efe" in phrases
+    assert "con información de reuters" in phrases
+    cleaned = cleaning.clean_article_text(
+        "Nota.\nEste artículo se publicó originalmente en Forbes US\nCon información de EFE", site="forbes")
+    assert cleaned == "Nota."
+
+
+def test_reglas_de_un_sitio_no_aplican_a_otro():
+    live = "Sigue el minuto a minuto del partido."
+    assert live not in cleaning.clean_article_text(TEXTO, site="marca")
+    assert live in cleaning.clean_article_text(TEXTO, site="forbes")
+    # Sin sitio se aplican todas las reglas, como antes
+    assert live not in cleaning.clean_article_text(TEXTO)
+
+
+def test_limpieza_completa():
+    assert cleaning.clean_article_text(TEXTO) == "\n".join([
+        "México y Francia firman un acuerdo comercial.",
+        "El texto sigue con más detalles.",
+        "Cierre de la nota.",
+    ])
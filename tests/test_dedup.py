@@ -0,0 +1,37 @@
+import dedup
+
+
+def _reset(tmp_path, monkeypatch):
+    monkeypatch.setattr(dedup, "DB_PATH", str(tmp_path / "dedup.sqlite3"))
+    monkeypatch.setattr(dedup, "_conn", None)
+
+
+def _text(seed):
+    return " ".join(f"{seed}{i}" for i in range(80))
+
+
+def test_misma_nota_en_otra_url_es_duplicado(tmp_path, monkeypatch):
+    _reset(tmp_path, monkeypatch)
+    cluster, original = dedup.assign("https://a/1", _text("efe"))
+    assert original is None
+    assert dedup.assign("https://b/1", _text("efe")) == (cluster, "https://a/1")
+
+
+def test_choque_de_banda_sin_parecido_no_hereda_el_cluster(tmp_path, monkeypatch):
+    _reset(tmp_path, monkeypatch)
+    real_bands = dedup._bands
+
+    def colliding_bands(sig):
+        # Todas las notas coinciden en la banda 0: candidatas LSH, pero distintas
+        return [(0, 1)] + real_bands(sig)[1:]
+
+    monkeypatch.setattr(dedup, "_bands", colliding_bands)
+    first, _ = dedup.assign("https://a/1", _text("alfa"))
+    second, original = dedup.assign("https://b/1", _text("beta"))
+    assert second != first
+    assert original is None
+
+    item = {"url": "https://c/1", "texto": _text("gamma")}
+    monkeypatch.setattr(dedup, "MODE", "collapse")
+    assert dedup.annotate(item) is True
+    assert "duplicado_de" not in item
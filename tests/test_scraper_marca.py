@@ -0,0 +1,69 @@
+import random
+
+from canonical import canonical_url
+from parsing import make_soup
+from scraper_marca import _collect_links, _is_article_url
+
+BASE = "https://www.marca.com/mx/"
+
+# La cadena de selectores CSS original: se recorre cada uno por turno
+SELECTORS = [
+    "article a[href]",
+    ".ue-c-cover-content__link[href]",
+    ".ue-c-article__link[href]",
+    ".mod-portadilla a[href]",
+    ".ue-c-card__header a[href]",
+    ".ue-c-card__link[href]",
+    ".ue-c-article__header a[href]",
+    "a[href]",
+]
+
+TAGS = ["div", "section", "article", "span", "li", "mod-portadilla"]
+CLASSES = ["article", "mod-portadilla", "ue-c-card__header", "ue-c-article__header",
+           "ue-c-cover-content__link", "ue-c-article__link", "ue-c-card__link", "otra"]
+
+
+def _selector_chain(html):
+    soup = make_soup(html)
+    links, seen = [], set()
+    for selector in SELECTORS:
+        for tag in soup.select(selector):
+            href = canonical_url(tag.get("href"), BASE)
+            if href in seen or not _is_article_url(href):
+                continue
+            seen.add(href)
+            links.append(href)
+    return links
+
+
+def _random_html(rng, depth=0):
+    parts = []
+    for _ in range(rng.randint(1, 4)):
+        classes = " ".join(rng.sample(CLASSES, rng.randint(0, 2)))
+        attrs = f' class="{classes}"' if classes else ""
+        if depth < 3 and rng.random() < 0.5:
+            tag = rng.choice(TAGS)
+            parts.append(f"<{tag}{attrs}>{_random_html(rng, depth + 1)}</{tag}>")
+        else:
+            tag = rng.choice(["a", "a", "a", "div"])
+            href = f"/mx/futbol/2026/01/{rng.randint(1, 12):02d}/nota.html"
+            parts.append(f'<{tag}{attrs} href="{href}">x</{tag}>')
+    return "".join(parts)
+
+
+def test_mismo_orden_que_la_cadena_de_selectores():
+    rng = random.Random(12)
+    for _ in range(2000):
+        html = f"<html><body>{_random_html(rng)}</body></html>"
+        assert _collect_links(BASE, html) == _selector_chain(html), html
+
+
+def test_clase_article_no_es_etiqueta_article():
+    html = ('<html><body>'
+            '<div class="article"><a href="/mx/a/2026/01/01/uno.html">1</a></div>'
+            '<div class="mod-portadilla"><a href="/mx/a/2026/01/01/dos.html">2</a></div>'
+            '</body></html>')
+    assert _collect_links(BASE, html) == [
+        "https://www.marca.com/mx/a/2026/01/01/dos.html",
+        "https://www.marca.com/mx/a/2026/01/01/uno.html",
+    ]
@@ -0,0 +1,101 @@
+import json
+
+import pytest
+import requests
+
+import archive
+import seen_store
+import wp_client
+
+
+class FakePosts:
+    """/wp-json/wp/v2/posts de una categoría, con paginación, _fields e include."""
+
+    def __init__(self):
+        self.posts = {}
+        self.calls = []
+
+    def publish(self, i, modified=None):
+        date = f"2026-01-01T00:{i:02d}:00"
+        self.posts[i] = {
+            "id": i, "link": f"https://wp.test/nota-{i}/", "date": date, "modified": modified or date,
+            "title": {"rendered": f"Nota {i}"}, "content": {"rendered": f"<p>Cuerpo {i}</p>"},
+        }
+
+    def edit(self, i, modified):
+        self.posts[i]["modified"] = modified
+        self.posts[i]["content"]["rendered"] = f"<p>Cuerpo {i} editado</p>"
+
+    def __call__(self, url, params=None, **kwargs):
+        self.calls.append(dict(params))
+        posts = list(self.posts.values())
+        if "modified_after" in params:
+            posts = [p for p in posts if p["modified"] > params["modified_after"]]
+        if "include" in params:
+            ids = {int(i) for i in params["include"].split(",")}
+            posts = [p for p in posts if p["id"] in ids]
+        key = params.get("orderby", "date")
+        posts.sort(key=lambda p: p[key], reverse=params.get("order", "desc") == "desc")
+        fields = params["_fields"].split(",")
+        per_page, page = params["per_page"], params["page"]
+        total_pages = max(1, -(-len(posts) // per_page))
+        body = [{k: v for k, v in p.items() if k in fields}
+                for p in posts[(page - 1) * per_page:page * per_page]]
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["X-WP-TotalPages"] = str(total_pages)
+        response._content = json.dumps(body).encode("utf-8")
+        return response
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    monkeypatch.setattr(wp_client, "SYNC_STATE_PATH", str(tmp_path / "wp_sync.json"))
+    monkeypatch.setattr(wp_client, "MAX_PER_PAGE", 4)
+    monkeypatch.setattr(seen_store, "DB_PATH", str(tmp_path / "seen.sqlite3"))
+    monkeypatch.setattr(seen_store, "_conn", None)
+    monkeypatch.setattr(archive, "REPLAY", False)
+    fake = FakePosts()
+    monkeypatch.setattr(wp_client, "fetch_cached", fake)
+    return fake
+
+
+def _ids(items):
+    return [int(item["url"].rstrip("/").rsplit("-", 1)[1]) for item in items]
+
+
+def _scrape(api):
+    api.calls.clear()
+    return wp_client.WordPressSite("https://wp.test", "prueba").scrape_category(1, limit=5)
+
+
+def test_sincronizacion_incremental(api):
+    for i in range(1, 30):
+        api.publish(i)
+
+    # Primera corrida: los `limit` más recientes
+    assert _ids(_scrape(api)) == [29, 28, 27, 26, 25]
+
+    # Sin novedades: una sola consulta, vacía
+    assert _ids(_scrape(api)) == [29, 28, 27, 26, 25]
+    assert len(api.calls) == 1
+    assert api.calls[0]["_fields"] == wp_client.SYNC_FIELDS
+
+    # Una edición dentro de la ventana: se vuelve a pedir solo ese cuerpo
+    api.edit(27, "2026-01-02T00:00:00")
+    items = _scrape(api)
+    assert _ids(items) == [29, 28, 27, 26, 25]
+    assert "editado" in items[2]["texto"]
+    assert [c.get("include") for c in api.calls if "include" in c] == ["27"]
+
+    # Muchas ediciones de notas viejas mezcladas con publicaciones nuevas
+    for i in range(30, 33):
+        api.publish(i, modified=f"2026-01-03T00:{i:02d}:00")
+    for i in range(1, 11):
+        api.edit(i, f"2026-01-03T01:{i:02d}:00")
+    assert _ids(_scrape(api)) == [32, 31, 30, 29, 28]
+    # Las notas viejas editadas no se piden con cuerpo
+    requested = ",".join(c["include"] for c in api.calls if "include" in c).split(",")
+    assert sorted(map(int, requested)) == [30, 31, 32]
+    assert _ids(_scrape(api)) == [32, 31, 30, 29, 28]
+    assert len(api.calls) == 1
@@ -1,67 +1,107 @@
-import re
+import os
+import sqlite3
+import threading
 
-def clean_article_text(text):
+import cleaning
+import profiling
+from canonical import canonical_url
+
+# Carpeta para el estado que se conserva entre corridas (índices, cachés, etc.)
+CACHE_DIR = os.environ.get("RSS_CACHE_DIR", ".cache")
+
+
+def write_atomic(path, data):
+    """
+    Escribe `data` (bytes, o str en UTF-8) en `path` sin que nadie llegue a ver el archivo
+    a medias: va a un temporal propio del proceso y del hilo (dos hilos pueden guardar
+    la misma ruta a la vez) y se mueve con os.replace. Crea la carpeta si hace falta.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def open_sqlite(path, schema):
+    """
+    Abre la base SQLite de `path` para compartirla entre los hilos del crawler (quien la
+    usa la protege con su propio candado): crea la carpeta, activa WAL y aplica `schema`
+    (sentencias CREATE ... IF NOT EXISTS).
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(schema)
+    conn.commit()
+    return conn
+
+def clean_article_text(text, site=None):
     """
     Limpia el texto de un artículo eliminando líneas no deseadas como:
     - Redes sociales (Facebook, Twitter, etc.)
     - Frases como "Compartir", "Sigue nuestro Showcase", etc.
     - Atribuciones tipo "Con información de..."
     - Handles de redes sociales en formatos específicos (@user/x)
+    Con `site` se aplican además las reglas propias de ese sitio (ver cleaning.SITE_RULES);
+    sin él se aplican todas.
     """
-    if not text:
-        return ""
+    with profiling.stage("limpieza"):
+        return cleaning.clean_article_text(text, site)
 
-    # Compilar regex para eficiencia
-    # "Con información de..." (insensible a mayúsculas/minúsculas)
-    re_info_de = re.compile(r"con informaci[oó]n de", re.IGNORECASE)
-    
-    # Handles de redes sociales: 
-    # (@Europarl_ES/x), (@Forsvarsmin/x), (@NormaOrtizRodr4/)
-    # Busca patrones que empiecen con (@, tengan caracteres, y terminen en /x) o /)
-    re_social_handle = re.compile(r"\(@[\w]+/[xX]?\)?") 
+class ArticleSink:
+    """
+    Artículos que entrega un scraper. Con `on_article` cada uno se pasa en cuanto se
+    agrega (ver xml_writer.XMLSectionWriter) y solo se cuenta, para que la memoria no
+    crezca con la sección; sin él se guardan y se recorren como una lista.
+    len() es siempre la cantidad entregada: es lo que usan los límites de max_articles.
+    """
 
-    # Frases específicas para filtrar (todo en minúsculas para comparación simple)
-    spam_phrases = [
-        "compartir", 
-        "¿te gusta informarte por google news?", 
-        "sigue nuestro showcase",
-        "facebook", "twitter", "instagram", "síguenos", "fuente:", "cortesía:", 
-        "x", # A veces 'x' solo aparece como red social
-        "sigue el minuto a minuto", "en vivo por internet", "actualizar narración", 
-        "canal: sin trasmisión", "te interesa", "marca.com", "se ampliará información",
-        "pronóstico marca mx", "dónde ver", "horario",
-        "con información de efe",
-        "este artículo fue publicado originalmente por forbes us",
-        "este artículo se publicó originalmente en forbes us",
-        "con información de reuters"
-        "Este artículo fue publicado originalmente en Forbes US"
-        "Este artículo cuenta con información parcial publicada en Forbes US."
-    ]
+    def __init__(self, on_article=None):
+        self.on_article = on_article
+        self.items = []
+        self.count = 0
 
-    clean_lines = []
-    
-    for line in text.split('\n'):
-        stripped_line = line.strip()
-        if not stripped_line:
-            continue
-            
-        lower_line = stripped_line.lower()
-        
-        # 1. Filtro por frases exactas o substrings comunes
-        if any(phrase in lower_line for phrase in spam_phrases):
-            continue
-            
-        # 2. Filtro por "Con información de"
-        if re_info_de.search(lower_line):
-            continue
-            
-        # 3. Filtro por handles de redes sociales (captions de fotos, etc.)
-        if re_social_handle.search(line):
-            continue
+    def append(self, item):
+        self.count += 1
+        if self.on_article:
+            self.on_article(item)
+        else:
+            self.items.append(item)
 
-        clean_lines.append(stripped_line)
+    def __len__(self):
+        return self.count
 
-    return "\n".join(clean_lines)
+    def __iter__(self):
+        return iter(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+def ordered_unique(links, base_url=None):
+    """
+    Devuelve los enlaces sin duplicados conservando el orden de la portada
+    (el orden en que aparecen es su prioridad). Los enlaces se comparan y se
+    devuelven en su forma canónica (canonical.canonical_url); si se da base_url,
+    los relativos se vuelven absolutos.
+    """
+    seen = set()
+    unique = []
+    for link in links:
+        if not link:
+            continue
+        link = canonical_url(link, base_url)
+        if link not in seen:
+            seen.add(link)
+            unique.append(link)
+    return unique
 
 def is_from_current_year(publish_date):
     """
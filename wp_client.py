@@ -0,0 +1,346 @@
+# wp_client.py
+import contextvars
+import html
+import json
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable
+from urllib.parse import urlparse
+
+import archive
+import metrics
+import seen_store
+from extraction import article_item, html_to_text
+from fetch import fetch_cached, extract_article
+from utils import CACHE_DIR, clean_article_text, write_atomic, ArticleSink
+
+log = logging.getLogger(__name__)
+
+# slug -> ID de categoría, persistido entre corridas: los IDs casi nunca cambian
+CATEGORY_CACHE_PATH = os.path.join(CACHE_DIR, "wp_categories.json")
+CATEGORY_TTL = 7 * 24 * 3600
+
+# Cursor de sincronización por categoría: último `modified` visto y los posts de la
+# ventana actual, para pedir en cada corrida solo lo nuevo o editado
+SYNC_STATE_PATH = os.path.join(CACHE_DIR, "wp_sync.json")
+
+# Tope de posts por página que aceptamos pedir al API (WordPress permite hasta 100)
+MAX_PER_PAGE = 50
+
+# Solo lo que usan los scrapers; _links/_embedded hacen falta para embeber la imagen destacada
+POST_FIELDS = "id,link,date,modified,title,content,_links,_embedded"
+
+# Lo justo para saber qué cambió (sin cuerpos): la consulta incremental por modified_after
+SYNC_FIELDS = "id,link,date,modified"
+
+_cache_lock = threading.Lock()
+
+
+def _load_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_json(path, data):
+    write_atomic(path, json.dumps(data))
+
+
+def post_summary(p: dict) -> tuple[str | None, str, str | None, str]:
+    """Link, título, imagen destacada y content.rendered de un post del WP REST."""
+    link = p.get("link")
+    title = html.unescape((p.get("title") or {}).get("rendered") or "")
+    top_img = None
+    media = (p.get("_embedded") or {}).get("wp:featuredmedia", [])
+    if media and isinstance(media, list) and media[0].get("source_url"):
+        top_img = media[0]["source_url"]
+    content = (p.get("content") or {}).get("rendered") or ""
+    return link, title, top_img, content
+
+
+class WordPressSite:
+    """
+    Cliente del WP REST API de un periódico hecho en WordPress:
+    - resuelve categorías por slug con una caché en disco (CATEGORY_CACHE_PATH);
+    - pide solo los campos necesarios (_fields) y solo la imagen destacada en _embed;
+    - lee X-WP-TotalPages de la primera página y baja las demás en paralelo;
+    - arma los artículos con el content.rendered del JSON (newspaper solo de respaldo).
+    """
+
+    def __init__(self, base_url: str, site: str, language: str | None = None,
+                 known_categories: dict | None = None, search_categories: bool = False):
+        self.base_url = base_url.rstrip("/")
+        self.site = site
+        self.language = language
+        self.posts_url = f"{self.base_url}/wp-json/wp/v2/posts"
+        self.categories_url = f"{self.base_url}/wp-json/wp/v2/categories"
+        self.known_categories = known_categories or {}
+        # Si no hay slug exacto, buscar con ?search= y quedarse con la mejor coincidencia
+        self.search_categories = search_categories
+        # Cuerpo de respaldo: se parsea y limpia en un proceso de extract_pool
+        self.fallback_hook = partial(article_item, site=site)
+        self._host = urlparse(self.base_url).netloc
+
+    # --- Categorías -------------------------------------------------------------
+
+    def category_id(self, slug: str) -> int | None:
+        if slug in self.known_categories:
+            return self.known_categories[slug]
+
+        with _cache_lock:
+            entry = _load_json(CATEGORY_CACHE_PATH).get(self._host, {}).get(slug)
+        if entry and time.time() - entry["at"] < CATEGORY_TTL:
+            return entry["id"]
+
+        cat_id = self._lookup_category(slug)
+        if cat_id is not None:
+            with _cache_lock:
+                data = _load_json(CATEGORY_CACHE_PATH)
+                data.setdefault(self._host, {})[slug] = {"id": cat_id, "at": time.time()}
+                _save_json(CATEGORY_CACHE_PATH, data)
+        return cat_id
+
+    def _lookup_category(self, slug: str) -> int | None:
+        try:
+            r = fetch_cached(self.categories_url, params={"slug": slug, "per_page": 1, "_fields": "id,slug"})
+            r.raise_for_status()
+            data = r.json()
+            if isinstance(data, list) and data:
+                return int(data[0]["id"])
+        except Exception as e:
+            log.warning("Error resolviendo categoría por slug='%s': %s", slug, e)
+
+        if not self.search_categories:
+            return None
+        try:
+            r = fetch_cached(self.categories_url, params={"search": slug, "per_page": 10, "_fields": "id,slug"})
+            r.raise_for_status()
+            data = r.json()
+            if isinstance(data, list) and data:
+                for c in data:
+                    if c.get("slug") == slug:
+                        return int(c["id"])
+                # si no hay slug exacto, devuelve la primera coincidencia
+                return int(data[0]["id"])
+        except Exception as e:
+            log.warning("Error buscando categoría '%s': %s", slug, e)
+        return None
+
+    # --- Posts ------------------------------------------------------------------
+
+    def _posts_page(self, cat_id: int, page: int, per_page: int, filters: dict):
+        """Devuelve (posts, total de páginas) de una página del listado de la categoría."""
+        params = {
+            "categories": cat_id,
+            "per_page": per_page,
+            "page": page,
+            "_fields": POST_FIELDS,
+            "orderby": "date",
+            "order": "desc",
+            **filters,
+        }
+        # La imagen destacada solo se embebe si se piden los campos donde viene
+        if "_embedded" in params["_fields"]:
+            params["_embed"] = "wp:featuredmedia"
+        r = fetch_cached(self.posts_url, params=params)
+        if r.status_code == 400 and "rest_post_invalid_page_number" in r.text:
+            return [], 0  # no hay más páginas
+        r.raise_for_status()
+        data = r.json()
+        total_pages = int(r.headers.get("X-WP-TotalPages") or page)
+        return (data if isinstance(data, list) else []), total_pages
+
+    def fetch_posts(self, cat_id: int, limit: int | None = 20, max_pages: int = 2, **filters) -> list[dict]:
+        """
+        Hasta `limit` posts de la categoría, del más nuevo al más viejo. La primera
+        página dice cuántas hay (X-WP-TotalPages); las que falten se piden a la vez.
+        `filters` se suman a la consulta (modified_after, include, orderby, _fields...).
+        Con `limit=None` se leen todas las páginas, sin tope de `max_pages`; si una
+        falla se devuelve lo leído hasta la anterior, sin huecos.
+        """
+        per_page = MAX_PER_PAGE if limit is None else min(limit, MAX_PER_PAGE)
+        try:
+            posts, total_pages = self._posts_page(cat_id, 1, per_page, filters)
+        except Exception as e:
+            log.warning("Error al pedir posts (cat_id=%s, page=1): %s", cat_id, e)
+            return []
+
+        last_page = total_pages if limit is None else min(max_pages, total_pages, math.ceil(limit / per_page))
+        pages = range(2, last_page + 1)
+        if posts and pages:
+            with ThreadPoolExecutor(max_workers=min(len(pages), 8), thread_name_prefix="wp") as executor:
+                # copy_context: las métricas y el log de cada página van con el sitio/sección
+                futures = [
+                    executor.submit(contextvars.copy_context().run, self._posts_page, cat_id, page, per_page, filters)
+                    for page in pages
+                ]
+                for page, future in zip(pages, futures):
+                    try:
+                        page_posts, _ = future.result()
+                    except Exception as e:
+                        # Las páginas van en orden: sin esta no se puede seguir sin dejar huecos
+                        log.warning("Error al pedir posts (cat_id=%s, page=%s): %s", cat_id, page, e)
+                        break
+                    if not page_posts:
+                        break
+                    posts.extend(page_posts)
+        return posts if limit is None else posts[:limit]
+
+    # --- Artículos --------------------------------------------------------------
+
+    def article_from_post(self, p: dict) -> dict:
+        link, title, top_img, content = post_summary(p)
+
+        # El cuerpo ya viene en el JSON: no se vuelve a pedir la nota
+        with metrics.timer("extract_seconds"):
+            rendered_text = html_to_text(content)
+        with metrics.timer("clean_seconds"):
+            texto = clean_article_text(rendered_text, site=self.site)
+        titulo, imagen = title, top_img
+        try:
+            # Solo si WordPress no entregó el cuerpo, se descarga la nota con newspaper
+            if link and not rendered_text:
+                body = extract_article(link, self.fallback_hook, language=self.language)
+                texto = body["texto"] or ""
+                if not titulo:
+                    titulo = body["titulo"] or ""
+                if not imagen:
+                    imagen = body["imagen_url"] or None
+        except Exception as e:
+            log.warning("Aviso: fallo al parsear artículo: %s (%s)", link, e)
+
+        return {
+            "url": link,
+            "titulo": titulo,
+            "texto": texto,
+            "imagen_url": imagen
+        }
+
+    # --- Sincronización incremental --------------------------------------------
+
+    def _sync_key(self, cat_id: int) -> str:
+        return f"{self._host}/{cat_id}"
+
+    def _load_sync(self, cat_id: int) -> dict:
+        with _cache_lock:
+            return _load_json(SYNC_STATE_PATH).get(self._sync_key(cat_id)) or {}
+
+    def _save_sync(self, cat_id: int, state: dict):
+        with _cache_lock:
+            data = _load_json(SYNC_STATE_PATH)
+            data[self._sync_key(cat_id)] = state
+            _save_json(SYNC_STATE_PATH, data)
+
+    def scrape_category(self, cat_id: int, limit: int = 20, max_pages: int = 2,
+                        on_article: Callable | None = None) -> list[dict]:
+        """
+        Artículos de los últimos `limit` posts de la categoría.
+
+        La primera vez se piden los `limit` posts más recientes. A partir de ahí se
+        guarda un cursor (el `modified` más reciente visto) y se listan todos los posts
+        publicados o editados desde entonces con modified_after, en orden ascendente de
+        `modified` y sin tope de páginas, pero solo con id, link y fechas (SYNC_FIELDS):
+        si se cortara en `limit`, las ediciones de notas viejas taparían a las
+        publicaciones nuevas y el cursor las dejaría atrás para siempre. Los cuerpos se
+        piden después con include= solo para los posts que quedan en la ventana. En una
+        sección sin novedades todo es una sola respuesta vacía. Los posts que no
+        cambiaron salen de seen_store, y los editados reemplazan su entrada en lugar de
+        duplicarse. Si algo no se pudo leer, el cursor no avanza más allá de lo leído.
+        """
+        if archive.REPLAY:
+            return self._replay_category(cat_id, limit, on_article)
+
+        state = self._load_sync(cat_id)
+        incremental = bool(state.get("cursor")) and state.get("limit", 0) >= limit
+        if incremental:
+            changed = self.fetch_posts(cat_id, None, modified_after=state["cursor"],
+                                       orderby="modified", order="asc", _fields=SYNC_FIELDS)
+        else:
+            changed = self.fetch_posts(cat_id, limit, max_pages)
+        changed = {p["link"]: p for p in changed if p.get("link")}
+        # Posts con el cuerpo ya en la mano (en la primera corrida, todos los pedidos)
+        bodies = {} if incremental else dict(changed)
+
+        # Ventana actual: la anterior más lo que cambió, ordenada por fecha de publicación
+        window = {e["url"]: e for e in state.get("window", [])} if incremental else {}
+        for link, p in changed.items():
+            window[link] = {"id": p.get("id"), "url": link, "date": p.get("date") or ""}
+        window = sorted(window.values(), key=lambda e: e["date"], reverse=True)[:limit]
+        metrics.inc("links_found_total", len(window))
+
+        # Lo que no cambió sale de seen_store; lo que cambió y lo que falta en seen_store
+        # (sin texto, o más viejo que --refresh-older-than) se pide junto por id
+        known = {}
+        for entry in window:
+            if entry["url"] in changed:
+                continue
+            known[entry["url"]] = seen_store.lookup(entry["url"])
+        wanted = [str(e["id"]) for e in window
+                  if e.get("id") and e["url"] not in bodies
+                  and (e["url"] in changed or not known.get(e["url"]))]
+        if wanted:
+            for p in self.fetch_posts(cat_id, len(wanted), math.ceil(len(wanted) / MAX_PER_PAGE),
+                                      include=",".join(wanted)):
+                if p.get("link"):
+                    bodies[p["link"]] = p
+        complete = all(e["url"] in bodies for e in window if e["url"] in changed)
+
+        items = ArticleSink(on_article)
+        kept = []
+        for entry in window:
+            url = entry["url"]
+            # Sin cursor (primera corrida) se reutiliza lo ya visto, como en el resto de sitios
+            item = known.get(url) or (None if incremental else seen_store.lookup(url))
+            if item is None and url in bodies:
+                item = self.article_from_post(bodies[url])
+                seen_store.remember(item)
+            if item is None:
+                continue  # ya no existe en el API: sale de la ventana
+            items.append(item)
+            kept.append(entry)
+
+        if kept:
+            cursor = state.get("cursor") or ""
+            if complete:
+                cursor = max([p.get("modified") or "" for p in changed.values()] + [cursor])
+            self._save_sync(cat_id, {
+                "cursor": cursor,
+                "limit": limit,
+                "window": kept,
+            })
+        return items
+
+    def _replay_category(self, cat_id: int, limit: int, on_article: Callable | None) -> list[dict]:
+        """
+        En modo replay la consulta incremental no se puede repetir (el cursor ya avanzó):
+        se juntan los posts de todas las respuestas archivadas de la categoría, con la
+        versión más reciente de cada uno, y se rearma la ventana de `limit` posts.
+        """
+        posts = {}
+        for params, response in archive.history(self.posts_url):
+            if params.get("categories") != str(cat_id) or response.status_code != 200:
+                continue
+            try:
+                data = response.json()
+            except ValueError:
+                continue
+            for p in data if isinstance(data, list) else []:
+                # Las respuestas de la consulta incremental no traen el cuerpo
+                if p.get("link") and "content" in p:
+                    posts[p["link"]] = p
+
+        window = sorted(posts.values(), key=lambda p: p.get("date") or "", reverse=True)[:limit]
+        metrics.inc("links_found_total", len(window))
+        items = ArticleSink(on_article)
+        for p in window:
+            item = self.article_from_post(p)
+            seen_store.remember(item)
+            items.append(item)
+        return items
@@ -0,0 +1,83 @@
+# xml_writer.py
+import os
+import xml.etree.ElementTree as ET
+
+XML_HEADER = b"<?xml version='1.0' encoding='utf-8'?>\n"
+
+# Campos de cada <noticia>, en el orden en que se escriben
+FIELDS = ('url', 'titulo', 'texto', 'imagen_url')
+
+# Datos opcionales que van como atributos de <noticia> (ver dedup.annotate)
+ATTRIBUTES = ('cluster', 'duplicado_de')
+
+
+def noticia_element(articulo):
+    """Construye el elemento <noticia> de un artículo (mismo formato que save_to_xml)."""
+    item = ET.Element('noticia', {a: articulo[a] for a in ATTRIBUTES if articulo.get(a)})
+    for field in FIELDS:
+        ET.SubElement(item, field).text = articulo.get(field, '')
+    return item
+
+
+class XMLSectionWriter:
+    """
+    Escribe <carpeta>/<archivo>.xml de forma incremental y atómica:
+    - cada artículo se serializa y se vuelca al disco en cuanto llega (memoria plana);
+    - todo se escribe en un archivo temporal que reemplaza al definitivo con os.replace,
+      así nadie llega a leer un XML a medio escribir.
+    Si la sección falla a mitad de camino, lo ya escrito se conserva; si no llegó
+    ningún artículo, el XML anterior se deja intacto. Quien no quiera conservar un
+    resultado parcial llama a abort() antes de salir.
+    """
+
+    def __init__(self, folder_name, filename, attrs=None):
+        self.path = os.path.join(folder_name, filename)
+        # Atributos de <noticias>, p. ej. la versión de reglas de clean_existing_xmls.py
+        self.attrs = attrs or {}
+        self.tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        self.count = 0
+        self._file = None
+
+    def __enter__(self):
+        # exist_ok: varias secciones del mismo sitio pueden crear la carpeta a la vez
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._file = open(self.tmp_path, 'wb')
+        root = ET.tostring(ET.Element('noticias', self.attrs), encoding='unicode')
+        # <noticias .../> -> <noticias ...>: el cierre se escribe en close()
+        self._file.write(XML_HEADER + root[:-3].encode('utf-8') + b'>')
+        return self
+
+    def write(self, articulo):
+        self.write_element(noticia_element(articulo))
+
+    def write_element(self, element):
+        """Escribe un <noticia> ya construido (p. ej. leído de un XML existente)."""
+        self._file.write(ET.tostring(element, encoding='unicode').encode('utf-8'))
+        self._file.flush()
+        self.count += 1
+
+    def close(self):
+        if self._file is None:
+            return
+        f, self._file = self._file, None
+        if not self.count:
+            f.close()
+            os.remove(self.tmp_path)
+            return
+        f.write(b'</noticias>')
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        """Descarta lo escrito: el temporal se borra y el XML anterior queda como estaba."""
+        if self._file is None:
+            return
+        f, self._file = self._file, None
+        f.close()
+        os.remove(self.tmp_path)
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False